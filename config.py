@@ -24,6 +24,87 @@ TAKE_PROFIT_PERCENTAGE = 10  # Take profit at 10% above purchase price
 TOP_ENTITIES_TO_BUY = 3
 BOTTOM_ENTITIES_TO_SELL = 3
 
+# Signal Configuration
+COMPOSITE_WEIGHTS = {
+    'sentiment_score': 0.3,
+    'objectivity_score': 0.2,
+    'agreement_score': 0.2,
+    'confidence_score': 0.15,
+    'credibility_score': 0.15
+}
+SIGNAL_MODE = 'snapshot'  # 'snapshot' ranks the latest cycle, 'rolling' ranks time-decayed scores
+SIGNAL_HALF_LIFE_DAYS = 14  # Age at which an observation's weight halves
+SIGNAL_MAX_AGE_DAYS = 30  # Symbols not seen for longer are not ranked
+
+# Parameter Sweep Configuration (values tried for each parameter by scripts/sweep.py)
+SWEEP_GRID = {
+    'sentiment_score': [0.1, 0.2, 0.3],
+    'objectivity_score': [0.1, 0.2, 0.3],
+    'agreement_score': [0.1, 0.2, 0.3],
+    'confidence_score': [0.1, 0.2, 0.3],
+    'credibility_score': [0.1, 0.2, 0.3],
+    'top_n': [2, 3, 4],
+    'bottom_n': [2, 3],
+    'stop_loss': [3, 5, 8],
+    'take_profit': [5, 10, 20]
+}
+
+# Strategy Configuration
+# Each entry trades the shared news and sentiment with its own settings, account and ledger.
+# Keys left out fall back to the settings above; an empty list runs one 'default' strategy.
+# Example: {'name': 'momentum', 'weights': {...}, 'top_n': 5, 'bottom_n': 2,
+#           'trade_amount_usd': 50, 'stop_loss': 8, 'take_profit': 20,
+#           'api_key_env': 'MOMENTUM_COINBASE_API_KEY', 'api_secret_env': 'MOMENTUM_COINBASE_API_SECRET'}
+STRATEGIES = []
+STRATEGY_WORKERS = 4  # Threads executing strategies in parallel
+
+# Exchange Configuration
+EXCHANGE_MODE = 'live'  # 'live' trades on Coinbase, 'paper' uses the simulated exchange
+
+# Paper Trading Configuration (simulated exchange)
+PAPER_STARTING_USD = 10000
+PAPER_DEFAULT_PRICE = 100.0  # Starting price for symbols without local price history
+PAPER_PRICE_VOLATILITY = 0.001  # Standard deviation of the log price step per quote
+PAPER_FEE_BPS = 60  # Fee per order in basis points
+PAPER_SLIPPAGE_BPS = 10  # Adverse price move per order in basis points
+PAPER_FILL_RATIO = 1.0  # Fraction of each order that fills
+PAPER_LATENCY_MS = 0  # Mean simulated request latency
+PAPER_RATE_LIMIT_PER_SECOND = 0  # Requests per second before rate-limit errors (0 disables)
+
+# API Cassette Configuration (record/replay of Perplexity, OpenAI and Coinbase calls)
+CASSETTE_MODE = 'off'  # 'off', 'record' or 'replay'
+CASSETTE_NAME = 'cycle'  # Cassette file name under CASSETTE_DIR
+CASSETTE_EMULATE_LATENCY = False  # Replay with the recorded response times
+
+# Scheduler Configuration
+TRADING_CYCLE_INTERVAL_HOURS = 168  # News, sentiment and trading cycle (weekly)
+RISK_CHECK_INTERVAL_SECONDS = 60  # Stop-loss and take-profit checks
+SCHEDULER_JITTER_SECONDS = 5  # Random delay added to each run
+TRADING_CYCLE_RETRY_MINUTES = 30  # Retry delay after a failed cycle, well within CHECKPOINT_MAX_AGE_HOURS
+
+# Risk Monitor Configuration
+RISK_MONITOR_FEED = 'poll'  # 'poll' (scheduled checks), 'coinbase' (websocket ticker) or 'replay'
+COINBASE_WS_URL = 'wss://ws-feed.exchange.coinbase.com'
+RISK_MONITOR_SYNC_SECONDS = 30  # How often to pick up newly opened positions
+RISK_MONITOR_REPLAY_SPEED = 0  # 0 replays as fast as possible, 1 in real time
+
+# Logging Configuration
+LOG_LEVEL = 'INFO'
+LOG_FORMAT = 'text'  # 'text' (key=value context) or 'json' (one object per line)
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log file at this size
+LOG_FILE_BACKUPS = 5
+LOG_RING_BUFFER_SIZE = 500  # Recent records kept in memory
+LOG_ERROR_EMAIL_EVENTS = 50  # Recent records attached to error notification emails
+
+# LLM Prompt Configuration
+PROMPT_COMPACTION = False  # Trim entity payloads to PROMPT_TOKEN_BUDGET and send scoring instructions once
+PROMPT_TOKEN_BUDGET = 300  # Max tokens of news per entity in the sentiment prompt when compacting
+
+# Profiling Configuration (python scripts/main.py --profile)
+PROFILE_SAMPLE_INTERVAL_MS = 5  # Stack sampling interval
+PROFILE_TRACE_MEMORY = False  # Per-stage peak memory via tracemalloc (skews timings; profile memory separately)
+PROFILE_TOP_N = 25  # Functions listed in the hot-function summary
+
 # News Analysis Configuration
 NEWS_LOOKBACK_DAYS = 7
 MIN_ARTICLE_ENGAGEMENT = 100  # Minimum number of engagements for an article
@@ -34,11 +115,35 @@ RELIABLE_SOURCE_DOMAINS = [
     'cointelegraph.com',
     'theblockcrypto.com'
 ]
+SOURCE_CREDIBILITY_WEIGHTS = {  # Scales credibility_score; reliable domains not listed weigh 1.0
+    'bloomberg.com': 1.0,
+    'reuters.com': 1.0,
+    'coindesk.com': 0.9,
+    'theblockcrypto.com': 0.85,
+    'cointelegraph.com': 0.8
+}
 
 # File Paths
 DATA_DIR = 'data'
 SENTIMENT_DATA_FILE = os.path.join(DATA_DIR, 'sentiment_analysis.csv')
-TRADE_HISTORY_FILE = os.path.join(DATA_DIR, 'trade_history.csv')
+SENTIMENT_HISTORY_FILE = os.path.join(DATA_DIR, 'sentiment_history.csv')
+TRADE_HISTORY_FILE = os.path.join(
+    DATA_DIR, 'paper_trade_history.csv' if EXCHANGE_MODE == 'paper' else 'trade_history.csv'
+)
+SCHEDULER_STATE_FILE = os.path.join(DATA_DIR, 'scheduler_state.json')
+RISK_MONITOR_REPLAY_FILE = os.path.join(DATA_DIR, 'price_ticks.csv')
+CHECKPOINT_DIR = os.path.join(DATA_DIR, 'checkpoints')
+SIGNAL_STATE_FILE = os.path.join(DATA_DIR, 'signal_state.npz')
+PRICE_HISTORY_DIR = os.path.join(DATA_DIR, 'prices')
+REPORTS_DIR = os.path.join(DATA_DIR, 'reports')
+CASSETTE_DIR = os.path.join(DATA_DIR, 'cassettes')
+STRATEGIES_DIR = os.path.join(DATA_DIR, 'strategies')
+LOG_FILE = os.path.join(DATA_DIR, 'bot.log')
+TOKEN_USAGE_FILE = os.path.join(DATA_DIR, 'token_usage.csv')
+
+# Cycle Checkpoint Configuration
+CHECKPOINT_MAX_AGE_HOURS = 24  # Older unfinished cycles are abandoned instead of resumed
+CHECKPOINT_RETENTION = 10  # Number of finished cycles to keep on disk
 
 # Sentiment Analysis Categories
 SENTIMENT_CATEGORIES = [
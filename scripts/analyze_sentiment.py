@@ -1,13 +1,23 @@
 import sys
 import os
+import logging
+import time
 import pandas as pd
 import openai
-from typing import Dict, List, Optional
+from openai.types.chat import ChatCompletion
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel, Field
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from signal_state import RollingSignalState
+from cassette import get_cassette
+from token_usage import compact_key_points, count_tokens, get_token_tracker, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_MODEL = "gpt-4o-mini"
 
 class SentimentScores(BaseModel):
     sentiment_score: float = Field(..., ge=0, le=100, description="Score from 0 (Extremely Negative) to 100 (Extremely Positive)")
@@ -21,7 +31,23 @@ class SentimentScores(BaseModel):
 
 class SentimentAnalyzer:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
+        self.cassette = get_cassette()
+        # Replayed calls are served from the cassette and need no client (or API key)
+        replaying = self.cassette is not None and self.cassette.mode == 'replay'
+        self.client = None if replaying else openai.OpenAI(api_key=config.OPENAI_API_KEY)
+        self.signal_state = RollingSignalState.load() if config.SIGNAL_MODE == 'rolling' else None
+        self.token_tracker = get_token_tracker()
+        
+    def _create_completion(self, **kwargs) -> ChatCompletion:
+        """Call the chat completions API, through the cassette when one is active."""
+        create = lambda: self.client.chat.completions.create(**kwargs)
+        if self.cassette is None:
+            return create()
+        return self.cassette.call(
+            'openai', 'chat.completions.create', kwargs, create,
+            serialize=lambda response: response.model_dump(mode='json'),
+            deserialize=ChatCompletion.model_validate
+        )
         
     def _generate_sentiment_schema(self) -> Dict:
         """Generate the JSON schema for structured sentiment analysis output."""
@@ -77,9 +103,14 @@ class SentimentAnalyzer:
             }
         }
 
-    def analyze_entity_sentiment(self, entity_data: Dict) -> Optional[Dict]:
-        """Analyze sentiment for a single entity using OpenAI with structured output."""
-        try:
+    def _build_prompts(self, entity_data: Dict) -> Tuple[str, str]:
+        """Build the system and user prompts for one entity.
+        
+        With PROMPT_COMPACTION the scoring instructions move into the system
+        prompt, which is identical for every entity, and the user prompt holds
+        only the entity's news, normalized and trimmed to PROMPT_TOKEN_BUDGET.
+        """
+        if not config.PROMPT_COMPACTION:
             system_prompt = """You are a cryptocurrency market analyst specializing in sentiment analysis.
             Your task is to analyze news data and provide numerical scores (0-100) for different sentiment dimensions.
             Focus on factual information and market trends. Be precise and consistent in your scoring."""
@@ -98,9 +129,50 @@ class SentimentAnalyzer:
             - Agreement: How consistent are different sources/opinions?
             - Confidence: How certain/reliable are the statements?
             - Credibility: How trustworthy are the sources?"""
+            return system_prompt, user_prompt
+        
+        system_prompt = (
+            "You are a cryptocurrency market analyst specializing in sentiment analysis. "
+            "Score the news about one cryptocurrency from 0 to 100 on: "
+            "Sentiment (how positive/negative), Objectivity (factual vs opinion-based), "
+            "Agreement (consistency across sources/opinions), Confidence (certainty of the statements) "
+            "and Credibility (trustworthiness of the sources). "
+            "Focus on factual information and market trends. Be precise and consistent in your scoring."
+        )
+        
+        # Short fields get up to a quarter of the budget each, key points the rest
+        field_budget = config.PROMPT_TOKEN_BUDGET // 4
+        market_sentiment = truncate_to_tokens(
+            ' '.join(str(entity_data['market_sentiment']).split()), field_budget, SENTIMENT_MODEL
+        )
+        volume_change = truncate_to_tokens(
+            ' '.join(str(entity_data['volume_change']).split()), field_budget, SENTIMENT_MODEL
+        )
+        key_points = compact_key_points(
+            entity_data['key_points'],
+            config.PROMPT_TOKEN_BUDGET
+            - count_tokens(market_sentiment, SENTIMENT_MODEL)
+            - count_tokens(volume_change, SENTIMENT_MODEL),
+            SENTIMENT_MODEL
+        )
+        
+        user_prompt = '\n'.join([
+            f"{entity_data['entity']} ({entity_data['symbol']})",
+            'Key points:',
+            *(f'- {point}' for point in key_points),
+            f'Market sentiment: {market_sentiment}',
+            f'Volume change: {volume_change}'
+        ])
+        return system_prompt, user_prompt
+
+    def analyze_entity_sentiment(self, entity_data: Dict) -> Optional[Dict]:
+        """Analyze sentiment for a single entity using OpenAI with structured output."""
+        try:
+            system_prompt, user_prompt = self._build_prompts(entity_data)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # Using gpt-4o-mini model
+            start = time.perf_counter()
+            response = self._create_completion(
+                model=SENTIMENT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -108,20 +180,29 @@ class SentimentAnalyzer:
                 response_format=self._generate_sentiment_schema(),
                 temperature=0.2  # Lower temperature for more consistent scoring
             )
+            self.token_tracker.record_openai(
+                response, (time.perf_counter() - start) * 1000, entity=entity_data['entity']
+            )
             
             # Handle potential refusal or content filter
             if hasattr(response.choices[0].message, 'refusal'):
-                print(f"Model refused to analyze {entity_data['entity']}: {response.choices[0].message.refusal}")
+                logger.warning("Model refused to analyze %s: %s", entity_data['entity'], response.choices[0].message.refusal)
                 return None
                 
             if response.choices[0].finish_reason == "content_filter":
-                print(f"Content filter triggered for {entity_data['entity']}")
+                logger.warning("Content filter triggered for %s", entity_data['entity'])
                 return None
                 
             # Extract and validate scores
             if response.choices[0].message.content:
                 try:
                     scores = eval(response.choices[0].message.content)
+                    
+                    # Weight credibility by the reliability of the entity's sources
+                    source_reliability = entity_data.get('source_reliability')
+                    if source_reliability is not None and not pd.isna(source_reliability):
+                        scores['credibility_score'] = scores['credibility_score'] * source_reliability
+                        
                     scores.update({
                         'entity': entity_data['entity'],
                         'symbol': entity_data['symbol'],
@@ -131,13 +212,13 @@ class SentimentAnalyzer:
                     validated_scores = SentimentScores(**scores)
                     return validated_scores.dict()
                 except Exception as e:
-                    print(f"Error parsing scores for {entity_data['entity']}: {str(e)}")
+                    logger.error("Error parsing scores for %s: %s", entity_data['entity'], e)
                     return None
             
             return None
             
         except Exception as e:
-            print(f"Error analyzing sentiment for {entity_data['entity']}: {str(e)}")
+            logger.error("Error analyzing sentiment for %s: %s", entity_data['entity'], e)
             return None
 
     def analyze_news_sentiment(self, news_df: pd.DataFrame) -> pd.DataFrame:
@@ -155,38 +236,75 @@ class SentimentAnalyzer:
         if not sentiment_df.empty:
             # Save sentiment analysis results
             sentiment_df.to_csv(config.SENTIMENT_DATA_FILE, index=False)
+            
+            # Append to the history used for backtests and parameter sweeps
+            sentiment_df.to_csv(
+                config.SENTIMENT_HISTORY_FILE,
+                mode='a',
+                index=False,
+                header=not os.path.exists(config.SENTIMENT_HISTORY_FILE)
+            )
         
         return sentiment_df
 
-    def get_trading_signals(self, sentiment_df: pd.DataFrame) -> Dict[str, List[str]]:
-        """Generate trading signals based on sentiment analysis."""
+    def get_signal_frame(self, sentiment_df: pd.DataFrame) -> pd.DataFrame:
+        """Score this cycle's sentiment and get the frame that signals are ranked on."""
         if sentiment_df.empty:
-            return {'buy': [], 'sell': []}
+            return sentiment_df
             
         # Calculate composite score (weighted average of all sentiment categories)
-        weights = {
-            'sentiment_score': 0.3,
-            'objectivity_score': 0.2,
-            'agreement_score': 0.2,
-            'confidence_score': 0.15,
-            'credibility_score': 0.15
-        }
-        
         sentiment_df['composite_score'] = sum(
             sentiment_df[col] * weight 
-            for col, weight in weights.items()
+            for col, weight in config.COMPOSITE_WEIGHTS.items()
         )
         
-        # Sort by composite score
-        sorted_df = sentiment_df.sort_values('composite_score', ascending=False)
+        # In rolling mode rank on time-decayed scores instead of this snapshot alone
+        if self.signal_state is not None:
+            self.signal_state.update_frame(sentiment_df)
+            self.signal_state.save()
+            return self.signal_state.to_frame(max_age_days=config.SIGNAL_MAX_AGE_DAYS)
+        return sentiment_df
+
+    def rank_signals(
+        self,
+        ranked_df: pd.DataFrame,
+        weights: Dict[str, float] = None,
+        top_n: int = None,
+        bottom_n: int = None
+    ) -> Dict[str, List[str]]:
+        """Pick buy and sell symbols from a signal frame, optionally with a strategy's own weights."""
+        if ranked_df.empty:
+            return {'buy': [], 'sell': []}
+        
+        # The composite is linear in the categories, so it can be re-weighted on decayed scores too
+        if weights and weights != config.COMPOSITE_WEIGHTS:
+            ranked_df = ranked_df.assign(composite_score=sum(
+                ranked_df[col] * weight
+                for col, weight in weights.items()
+            ))
         
+        top_n = config.TOP_ENTITIES_TO_BUY if top_n is None else top_n
+        bottom_n = config.BOTTOM_ENTITIES_TO_SELL if bottom_n is None else bottom_n
         return {
-            'buy': sorted_df.head(config.TOP_ENTITIES_TO_BUY)['symbol'].tolist(),
-            'sell': sorted_df.tail(config.BOTTOM_ENTITIES_TO_SELL)['symbol'].tolist()
+            'buy': ranked_df.nlargest(top_n, 'composite_score')['symbol'].tolist(),
+            'sell': ranked_df.nsmallest(bottom_n, 'composite_score')['symbol'].tolist()
         }
 
+    def get_trading_signals(
+        self,
+        sentiment_df: pd.DataFrame,
+        weights: Dict[str, float] = None,
+        top_n: int = None,
+        bottom_n: int = None
+    ) -> Dict[str, List[str]]:
+        """Generate trading signals based on sentiment analysis."""
+        return self.rank_signals(self.get_signal_frame(sentiment_df), weights, top_n, bottom_n)
+
 if __name__ == "__main__":
     from fetch_news import NewsFetcher
+    from logs import setup_logging
+    
+    setup_logging(log_file=None)
     
     # Test the sentiment analysis pipeline
     fetcher = NewsFetcher()
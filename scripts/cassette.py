@@ -0,0 +1,206 @@
+import sys
+import os
+import json
+import gzip
+import logging
+import atexit
+import hashlib
+import threading
+import time
+import requests
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from sim_exchange import APIObject
+
+logger = logging.getLogger(__name__)
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when a request has no recorded response left."""
+
+class CassetteReplayError(Exception):
+    """Re-raises an error that the recorded call originally failed with."""
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response built from a recorded HTTP response."""
+
+    def __init__(self, status_code: int, body: Any):
+        self.status_code = status_code
+        self._body = body
+        self.text = body if isinstance(body, str) else json.dumps(body)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ReplayResponse':
+        return cls(data['status_code'], data['body'])
+
+    def json(self) -> Any:
+        return json.loads(self._body) if isinstance(self._body, str) else self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error (replayed)", response=self)
+
+def serialize_http_response(response) -> Dict:
+    """Convert a requests.Response into a recordable dict."""
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text
+    return {'status_code': response.status_code, 'body': body}
+
+def _to_plain(value: Any) -> Any:
+    """Round-trip through JSON so client objects are stored as plain data."""
+    return json.loads(json.dumps(value, default=str))
+
+class Cassette:
+    """Records outbound API calls to a gzip JSON-lines file and serves them back.
+
+    Each interaction is keyed by service, operation and a hash of the request.
+    Identical requests (e.g. repeated price quotes) are replayed in the order
+    they were recorded. Secrets such as headers are never part of the request.
+    Every interaction is written as its own gzip member, so a recording cut
+    short by a crash or kill still replays up to its last complete interaction.
+    """
+
+    def __init__(self, path: str, mode: str, emulate_latency: bool = False):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.emulate_latency = emulate_latency
+        self._lock = threading.Lock()
+        self._file = None
+        self._interactions = defaultdict(deque)
+
+        if mode == 'replay':
+            self._load()
+
+    @staticmethod
+    def _key(service: str, operation: str, request: Any) -> str:
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+        return f'{service}:{operation}:{digest}'
+
+    def _load(self):
+        count = 0
+        try:
+            with gzip.open(self.path, 'rt') as f:
+                for line in f:
+                    interaction = json.loads(line)
+                    self._interactions[interaction['key']].append(interaction)
+                    count += 1
+        except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+            logger.warning("Cassette %s ends in a partial write (%s), replaying its first %d interactions",
+                           self.path, e, count)
+
+    def _write(self, interaction: Dict):
+        member = gzip.compress((json.dumps(interaction, default=str) + '\n').encode())
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._file = open(self.path, 'wb')
+                atexit.register(self.close)
+            self._file.write(member)
+            self._file.flush()
+
+    def call(
+        self,
+        service: str,
+        operation: str,
+        request: Any,
+        func: Callable[[], Any],
+        serialize: Callable[[Any], Any] = _to_plain,
+        deserialize: Callable[[Any], Any] = lambda data: data
+    ) -> Any:
+        """Run `func` and record it, or return its recorded result in replay mode."""
+        key = self._key(service, operation, request)
+
+        if self.mode == 'replay':
+            with self._lock:
+                queue = self._interactions.get(key)
+                if not queue:
+                    raise CassetteMissError(f"No recorded response for {service} {operation}")
+                interaction = queue.popleft()
+
+            if self.emulate_latency:
+                time.sleep(interaction['latency_ms'] / 1000)
+            if interaction.get('error'):
+                raise CassetteReplayError(interaction['error'])
+            return deserialize(interaction['response'])
+
+        interaction = {
+            'key': key,
+            'service': service,
+            'operation': operation,
+            'request': request,
+            'recorded_at': datetime.now().isoformat()
+        }
+        start = time.perf_counter()
+        try:
+            result = func()
+        except Exception as e:
+            interaction.update(latency_ms=(time.perf_counter() - start) * 1000, error=str(e))
+            self._write(interaction)
+            raise
+
+        interaction.update(latency_ms=(time.perf_counter() - start) * 1000, response=serialize(result))
+        self._write(interaction)
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class CassetteClient:
+    """Wraps an exchange client so every method call goes through a cassette."""
+
+    def __init__(self, client, cassette: Cassette, service: str = 'coinbase'):
+        self._client = client
+        self._cassette = cassette
+        self._service = service
+
+    def __getattr__(self, name: str):
+        def method(*args, **kwargs):
+            return self._cassette.call(
+                self._service,
+                name,
+                {'args': list(args), 'kwargs': kwargs},
+                lambda: getattr(self._client, name)(*args, **kwargs),
+                deserialize=lambda data: APIObject(data) if isinstance(data, dict) else data
+            )
+        return method
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+def get_cassette() -> Optional[Cassette]:
+    """Get the process-wide cassette selected by CASSETTE_MODE, or None when off."""
+    global _cassette
+    if config.CASSETTE_MODE == 'off':
+        return None
+
+    with _cassette_lock:
+        if _cassette is None:
+            path = os.path.join(config.CASSETTE_DIR, f'{config.CASSETTE_NAME}.jsonl.gz')
+            _cassette = Cassette(path, config.CASSETTE_MODE, config.CASSETTE_EMULATE_LATENCY)
+        return _cassette
+
+if __name__ == "__main__":
+    # Summarize a recorded cassette
+    path = os.path.join(config.CASSETTE_DIR, f'{config.CASSETTE_NAME}.jsonl.gz')
+    cassette = Cassette(path, 'replay')
+
+    counts = defaultdict(lambda: [0, 0.0])
+    for queue in cassette._interactions.values():
+        for interaction in queue:
+            entry = counts[(interaction['service'], interaction['operation'])]
+            entry[0] += 1
+            entry[1] += interaction['latency_ms']
+
+    print(f"\nCassette {path}:")
+    for (service, operation), (count, latency_ms) in sorted(counts.items()):
+        print(f"{service:>11} {operation:<28} {count:>5} calls  {latency_ms / 1000:8.2f}s total")
@@ -0,0 +1,202 @@
+import sys
+import os
+import logging
+import json
+import shutil
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+# Version 2 keys signals and orders by strategy; version 1 manifests have no version field
+MANIFEST_VERSION = 2
+
+# Orders that reached the exchange call (or may have) are never sent again;
+# 'not_sent' orders failed before it, e.g. on the price quote, and are retried
+SENT_ORDER_STATUSES = ('pending', 'submitted', 'failed')
+
+class CycleCheckpoint:
+    """Persists the output of each trading cycle stage so a crashed cycle can resume.
+
+    Every cycle gets a directory under CHECKPOINT_DIR holding a manifest of
+    completed stages, one file per stage output and a record of every order
+    sent, so a restarted cycle never re-submits an order.
+    """
+
+    def __init__(self, cycle_id: str, checkpoint_dir: str = config.CHECKPOINT_DIR):
+        self.cycle_id = cycle_id
+        self.checkpoint_dir = checkpoint_dir
+        self.path = os.path.join(checkpoint_dir, cycle_id)
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    @classmethod
+    def new(cls, checkpoint_dir: str = config.CHECKPOINT_DIR) -> 'CycleCheckpoint':
+        """Start a checkpoint for a new cycle."""
+        cycle_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        checkpoint = cls(cycle_id, checkpoint_dir)
+        checkpoint._save_manifest()
+        return checkpoint
+
+    @classmethod
+    def latest_incomplete(cls, checkpoint_dir: str = config.CHECKPOINT_DIR) -> Optional['CycleCheckpoint']:
+        """Find the most recent unfinished cycle that is still recent enough to resume."""
+        if not os.path.isdir(checkpoint_dir):
+            return None
+
+        for cycle_id in sorted(os.listdir(checkpoint_dir), reverse=True):
+            if not os.path.isdir(os.path.join(checkpoint_dir, cycle_id)):
+                continue
+            checkpoint = cls(cycle_id, checkpoint_dir)
+            if checkpoint.manifest['completed'] or checkpoint.manifest.get('abandoned'):
+                continue
+
+            age = datetime.now() - datetime.fromisoformat(checkpoint.manifest['created_at'])
+            if age > timedelta(hours=config.CHECKPOINT_MAX_AGE_HOURS):
+                logger.warning("Abandoning stale cycle %s started %s", cycle_id, checkpoint.manifest['created_at'])
+                checkpoint.manifest['abandoned'] = True
+                checkpoint._save_manifest()
+                continue
+
+            return checkpoint
+        return None
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, 'manifest.json')
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path()) as f:
+                return self._migrate(json.load(f))
+        return {
+            'version': MANIFEST_VERSION,
+            'cycle_id': self.cycle_id,
+            'created_at': datetime.now().isoformat(),
+            'completed_stages': [],
+            'orders': {},
+            'completed': False
+        }
+
+    @staticmethod
+    def _migrate(manifest: Dict) -> Dict:
+        """Upgrade a manifest written before multiple strategies.
+
+        Version 1 cycles ran only the 'default' strategy: their signals are a
+        single {'buy', 'sell'} dict and their order keys lack the strategy prefix.
+        """
+        if manifest.get('version', 1) < 2:
+            outputs = manifest.get('outputs', {})
+            if 'signals' in outputs:
+                outputs['signals'] = {'default': outputs['signals']}
+            manifest['orders'] = {f'default:{key}': order for key, order in manifest['orders'].items()}
+            manifest['version'] = MANIFEST_VERSION
+        return manifest
+
+    def _save_manifest(self):
+        """Write the manifest atomically so a crash never leaves it half written."""
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, default=str)
+        os.replace(tmp_path, self._manifest_path())
+
+    def is_complete(self, stage: str) -> bool:
+        """Check whether a stage finished in this cycle."""
+        return stage in self.manifest['completed_stages']
+
+    def mark_complete(self, stage: str):
+        """Record that a stage finished."""
+        with self._lock:
+            if stage not in self.manifest['completed_stages']:
+                self.manifest['completed_stages'].append(stage)
+            self._save_manifest()
+
+    def save_frame(self, stage: str, df: pd.DataFrame):
+        """Persist a stage's DataFrame and mark the stage complete."""
+        os.makedirs(self.path, exist_ok=True)
+        file_path = os.path.join(self.path, f'{stage}.pkl')
+        df.to_pickle(file_path + '.tmp')
+        os.replace(file_path + '.tmp', file_path)
+        self.mark_complete(stage)
+
+    def load_frame(self, stage: str) -> pd.DataFrame:
+        """Load a stage's DataFrame."""
+        return pd.read_pickle(os.path.join(self.path, f'{stage}.pkl'))
+
+    def save_json(self, stage: str, data: Any):
+        """Persist a stage's JSON-serializable output and mark the stage complete."""
+        with self._lock:
+            self.manifest.setdefault('outputs', {})[stage] = data
+        self.mark_complete(stage)
+
+    def load_json(self, stage: str) -> Any:
+        """Load a stage's JSON output."""
+        return self.manifest['outputs'][stage]
+
+    def order_status(self, key: str) -> Optional[str]:
+        """Get an order's recorded status, None if it was never attempted."""
+        order = self.manifest['orders'].get(key)
+        return order['status'] if order else None
+
+    def has_order(self, key: str) -> bool:
+        """Check whether an order was already sent (or may have been) in this cycle."""
+        return self.order_status(key) in SENT_ORDER_STATUSES
+
+    def unsent_orders(self, prefix: str = '') -> List[str]:
+        """Keys starting with `prefix` of orders that failed before reaching the exchange."""
+        return [
+            key for key, order in self.manifest['orders'].items()
+            if key.startswith(prefix) and order['status'] == 'not_sent'
+        ]
+
+    def record_order(self, key: str, status: str):
+        """Record an order's status; 'pending' is written right before the order is sent."""
+        with self._lock:
+            self.manifest['orders'][key] = {
+                'status': status,
+                'updated_at': datetime.now().isoformat()
+            }
+            self._save_manifest()
+
+    def record_failure(self, error: str) -> bool:
+        """Record a failed attempt at the cycle; True if it is the cycle's first failure."""
+        with self._lock:
+            failures = self.manifest.setdefault('failures', [])
+            failures.append({'error': error, 'failed_at': datetime.now().isoformat()})
+            self._save_manifest()
+            return len(failures) == 1
+
+    def mark_cycle_complete(self):
+        """Mark the whole cycle finished and prune old checkpoints."""
+        with self._lock:
+            self.manifest['completed'] = True
+            self._save_manifest()
+        self._prune()
+
+    def _prune(self):
+        """Keep only the most recent CHECKPOINT_RETENTION finished cycles."""
+        finished = []
+        for cycle_id in sorted(os.listdir(self.checkpoint_dir)):
+            if not os.path.isdir(os.path.join(self.checkpoint_dir, cycle_id)):
+                continue
+            checkpoint = CycleCheckpoint(cycle_id, self.checkpoint_dir)
+            if checkpoint.manifest['completed'] or checkpoint.manifest.get('abandoned'):
+                finished.append(checkpoint.path)
+
+        for path in finished[:-config.CHECKPOINT_RETENTION]:
+            shutil.rmtree(path, ignore_errors=True)
+
+if __name__ == "__main__":
+    # Show any cycle that would be resumed on the next run
+    checkpoint = CycleCheckpoint.latest_incomplete()
+
+    if checkpoint:
+        print(f"Cycle {checkpoint.cycle_id} would resume after: {checkpoint.manifest['completed_stages']}")
+        print(f"Orders already sent: {checkpoint.manifest['orders']}")
+    else:
+        print("No incomplete cycle to resume")
@@ -1,13 +1,20 @@
 import sys
 import os
+import logging
 import json
+import time
 import requests
 from datetime import datetime, timedelta
 import pandas as pd
-from typing import List, Dict
+from typing import Dict
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from cassette import ReplayResponse, get_cassette, serialize_http_response
+from source_index import SourceReliabilityIndex
+from token_usage import get_token_tracker
+
+logger = logging.getLogger(__name__)
 
 class NewsFetcher:
     def __init__(self):
@@ -16,6 +23,9 @@ class NewsFetcher:
             "Authorization": f"Bearer {config.PERPLEXITY_API_KEY}",
             "Content-Type": "application/json"
         }
+        self.cassette = get_cassette()
+        self.source_index = SourceReliabilityIndex()
+        self.token_tracker = get_token_tracker()
         
     def _generate_prompt(self) -> Dict:
         """Generate a structured prompt and parameters for Perplexity API."""
@@ -57,12 +67,16 @@ class NewsFetcher:
             "stream": False
         }
 
-    def _filter_sources(self, sources: List[Dict]) -> List[Dict]:
-        """Filter sources based on reliability and engagement."""
-        return [
-            source for source in sources
-            if any(domain in source['url'].lower() for domain in config.RELIABLE_SOURCE_DOMAINS)
-        ]
+    def _post(self, payload: Dict):
+        """Send a request to the Perplexity API, through the cassette when one is active."""
+        send = lambda: requests.post(self.api_url, json=payload, headers=self.headers)
+        if self.cassette is None:
+            return send()
+        return self.cassette.call(
+            'perplexity', 'chat.completions', payload, send,
+            serialize=serialize_http_response,
+            deserialize=ReplayResponse.from_dict
+        )
 
     def fetch_crypto_news(self) -> pd.DataFrame:
         """Fetch and process cryptocurrency news using Perplexity API."""
@@ -71,22 +85,20 @@ class NewsFetcher:
             payload = self._generate_prompt()
             
             # Make API request
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                headers=self.headers
-            )
+            start = time.perf_counter()
+            response = self._post(payload)
             response.raise_for_status()
             
             # Extract and parse the response
             result = response.json()
+            self.token_tracker.record_perplexity(result, (time.perf_counter() - start) * 1000)
             news_data = json.loads(result['choices'][0]['message']['content'])
             
             # Convert to DataFrame
             df = pd.DataFrame(news_data)
             
-            # Filter sources
-            df['sources'] = df['sources'].apply(self._filter_sources)
+            # Filter sources by hostname and attach their credibility weight
+            df = self.source_index.filter_frame(df)
             
             # Add timestamp
             df['timestamp'] = datetime.now()
@@ -97,7 +109,7 @@ class NewsFetcher:
             return df
             
         except Exception as e:
-            print(f"Error fetching news data: {str(e)}")
+            logger.error("Error fetching news data: %s", e)
             return pd.DataFrame()
 
     def get_latest_news(self) -> pd.DataFrame:
@@ -105,19 +117,23 @@ class NewsFetcher:
         df = self.fetch_crypto_news()
         
         if df.empty:
-            print("No news data retrieved")
+            logger.warning("No news data retrieved")
             return df
         
         # Filter out entries with no sources after filtering
-        df = df[df['sources'].apply(len) > 0]
+        df = df[df['sources'].str.len() > 0]
         
         # Sort by number of sources (as a proxy for importance)
-        df['source_count'] = df['sources'].apply(len)
+        df = df.assign(source_count=df['sources'].str.len())
         df = df.sort_values('source_count', ascending=False).drop('source_count', axis=1)
         
         return df
 
 if __name__ == "__main__":
+    from logs import setup_logging
+    
+    setup_logging(log_file=None)
+    
     fetcher = NewsFetcher()
     news_data = fetcher.get_latest_news()
     
@@ -0,0 +1,169 @@
+import sys
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Structured fields attached to every record, set per cycle/stage/symbol with log_context
+CONTEXT_FIELDS = ('cycle_id', 'stage', 'strategy', 'symbol')
+# Per-record fields passed with extra=, e.g. logger.info(..., extra={'latency_ms': 12.5})
+EXTRA_FIELDS = ('latency_ms',)
+
+_context = {field: ContextVar(field, default=None) for field in CONTEXT_FIELDS}
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields such as cycle_id, stage or symbol to records logged inside the block.
+
+    Context variables follow asyncio tasks and asyncio.to_thread; work handed to a
+    thread pool must be submitted through contextvars.copy_context().run.
+    """
+    tokens = [(_context[field], _context[field].set(value)) for field, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def get_log_context() -> Dict[str, Optional[str]]:
+    """Get the current value of every context field."""
+    return {field: var.get() for field, var in _context.items()}
+
+class ContextFilter(logging.Filter):
+    """Copies the current log context onto records in the thread that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, var in _context.items():
+            if getattr(record, field, None) is None:
+                setattr(record, field, var.get())
+        return True
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as 'key=value' text or one JSON object per line."""
+
+    def __init__(self, json_lines: bool = False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def _fields(self, record: logging.LogRecord) -> dict:
+        return {
+            field: getattr(record, field)
+            for field in CONTEXT_FIELDS + EXTRA_FIELDS
+            if getattr(record, field, None) is not None
+        }
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message = f'{message}\n{record.exc_text}'
+
+        timestamp = datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')
+        fields = self._fields(record)
+
+        if self.json_lines:
+            return json.dumps({
+                'time': timestamp,
+                'level': record.levelname,
+                'logger': record.name,
+                'message': message,
+                **fields
+            }, default=str)
+
+        context = ' '.join(
+            f'{field}={value:.1f}' if isinstance(value, float) else f'{field}={value}'
+            for field, value in fields.items()
+        )
+        return f"{timestamp} {record.levelname:<7} {record.name}: {message}" + (f" [{context}]" if context else '')
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records in memory for error reports.
+
+    Appending to a bounded deque is O(1) and never touches I/O, so the handler
+    sits directly on the root logger and is always up to date when an error
+    notification is sent. Records are only formatted when read.
+    """
+
+    def __init__(self, capacity: int = config.LOG_RING_BUFFER_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        record.message = record.getMessage()
+        self.records.append(record)
+
+    def recent(self, count: Optional[int] = None) -> str:
+        """Format the last `count` records (all buffered records by default)."""
+        records = list(self.records)
+        if count is not None:
+            records = records[-count:]
+        return '\n'.join(self.format(record) for record in records)
+
+_listener = None
+_ring_buffer = None
+_setup_lock = threading.Lock()
+
+def setup_logging(level: str = config.LOG_LEVEL, log_file: Optional[str] = config.LOG_FILE):
+    """Route all logging through a queue to console and file handlers on a background thread.
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener, _ring_buffer
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = StructuredFormatter(json_lines=config.LOG_FORMAT == 'json')
+        context_filter = ContextFilter()
+
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file:
+            os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+            handlers.append(logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=config.LOG_FILE_MAX_BYTES, backupCount=config.LOG_FILE_BACKUPS
+            ))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # Callers only enqueue; formatting and writes happen on the listener thread
+        queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(context_filter)
+
+        _ring_buffer = RingBufferHandler()
+        _ring_buffer.setFormatter(formatter)
+        _ring_buffer.addFilter(context_filter)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+        root.addHandler(_ring_buffer)
+
+        _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def get_recent_logs(count: Optional[int] = None) -> str:
+    """Get the most recent log records as text, empty if logging is not set up."""
+    if _ring_buffer is None:
+        return ''
+    return _ring_buffer.recent(count)
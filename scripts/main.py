@@ -1,9 +1,14 @@
 import sys
 import os
-import schedule
 import time
-from datetime import datetime
+import argparse
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import copy_context
 import pandas as pd
+from typing import Dict
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
@@ -12,70 +17,219 @@ from analyze_sentiment import SentimentAnalyzer
 from trade import CryptoTrader
 from notify import EmailNotifier
 from visualize import PortfolioVisualizer
+from scheduler import AsyncScheduler, JobFailedError
+from risk_monitor import RiskMonitor, create_price_feed
+from checkpoint import CycleCheckpoint
+from strategy import Strategy, load_strategies
+from logs import get_log_context, log_context, setup_logging
+from profiler import CycleProfiler
+from token_usage import get_token_tracker
+
+logger = logging.getLogger(__name__)
 
 class CryptoTradingBot:
-    def __init__(self):
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.profiler = None
         self.news_fetcher = NewsFetcher()
         self.sentiment_analyzer = SentimentAnalyzer()
-        self.trader = CryptoTrader()
+        self.strategies = load_strategies()
+        self.traders = [CryptoTrader(strategy) for strategy in self.strategies]
         self.notifier = EmailNotifier()
-        self.visualizer = PortfolioVisualizer()
+        
+    @contextmanager
+    def _stage(self, name: str):
+        """Tag log records with a cycle stage and log how long the stage took."""
+        if self.profiler is not None:
+            strategy = get_log_context()['strategy']
+            profile_stage = self.profiler.stage(f'{name}:{strategy}' if strategy else name)
+        else:
+            profile_stage = nullcontext()
+            
+        with log_context(stage=name), profile_stage:
+            start = time.perf_counter()
+            yield
+            logger.info("Finished stage %s", name, extra={'latency_ms': (time.perf_counter() - start) * 1000})
+        
+    def _execute_strategy(self, trader: CryptoTrader, trading_signals: Dict, checkpoint: CycleCheckpoint):
+        """Execute one strategy's trades, skipping them if an interrupted run finished them.
+        
+        Raises if any order failed before reaching the exchange, so the stage
+        stays incomplete and the retried cycle sends those orders again.
+        """
+        stage = f'trades:{trader.strategy.name}'
+        if checkpoint.is_complete(stage):
+            return
+        with log_context(strategy=trader.strategy.name), self._stage('trades'):
+            logger.info("Executing trades for strategy %s", trader.strategy.name)
+            trader.execute_trades(trading_signals, checkpoint)
+            unsent = checkpoint.unsent_orders(f'{trader.strategy.name}:')
+            if unsent:
+                raise Exception(f"Orders not sent for strategy {trader.strategy.name}: {', '.join(unsent)}")
+            checkpoint.mark_complete(stage)
+        
+    def _generate_report(self, strategy: Strategy) -> Dict:
+        """Generate one strategy's performance report from its own ledger."""
+        visualizer = PortfolioVisualizer(strategy.trade_history_file)
+        return visualizer.generate_performance_report(strategy.reports_dir)
+        
+    def check_risk_limits(self):
+        """Check stop-loss and take-profit for every strategy."""
+        for trader in self.traders:
+            with log_context(strategy=trader.strategy.name):
+                trader.check_risk_limits()
         
     def execute_trading_cycle(self):
-        """Execute one complete trading cycle."""
+        """Execute one complete trading cycle, resuming an interrupted one if present.
+
+        Errors are logged, emailed on the cycle's first failure only and
+        re-raised, so the scheduler retries the cycle from its checkpoint
+        instead of recording it as run.
+        """
+        checkpoint = None
         try:
-            print(f"\nStarting trading cycle at {datetime.now()}")
-            
-            # 1. Fetch news data
-            print("Fetching news data...")
-            news_data = self.news_fetcher.get_latest_news()
+            checkpoint = CycleCheckpoint.latest_incomplete()
+            if checkpoint:
+                logger.info("Resuming trading cycle %s after stages: %s", checkpoint.cycle_id,
+                            ', '.join(checkpoint.manifest['completed_stages']) or 'none')
+            else:
+                checkpoint = CycleCheckpoint.new()
+                logger.info("Starting trading cycle %s", checkpoint.cycle_id)
             
-            if news_data.empty:
-                raise Exception("No news data retrieved")
-                
-            # 2. Analyze sentiment
-            print("Analyzing sentiment...")
-            sentiment_results = self.sentiment_analyzer.analyze_news_sentiment(news_data)
+            with log_context(cycle_id=checkpoint.cycle_id):
+                try:
+                    self._run_cycle(checkpoint)
+                finally:
+                    # Token usage is recorded per cycle, including failed ones
+                    get_token_tracker().flush()
             
-            # 3. Generate trading signals
-            print("Generating trading signals...")
-            trading_signals = self.sentiment_analyzer.get_trading_signals(sentiment_results)
+        except Exception as e:
+            error_message = f"Error in trading cycle: {str(e)}"
+            logger.exception(error_message)
+            if checkpoint is None or checkpoint.record_failure(str(e)):
+                self.notifier.send_error_notification(error_message)
+            raise JobFailedError(error_message) from e
             
-            # 4. Execute trades
-            print("Executing trades...")
-            self.trader.execute_trades(trading_signals)
+    def profile_trading_cycle(self):
+        """Run a trading cycle under the sampling profiler and write its hot-path report."""
+        self.profiler = CycleProfiler()
+        try:
+            with self.profiler:
+                self.execute_trading_cycle()
+            self.profiler.write_report(config.REPORTS_DIR)
+        finally:
+            self.profiler = None
             
-            # 5. Generate and send performance report
-            print("Generating performance report...")
-            stats = self.visualizer.generate_performance_report()
+    def _run_cycle(self, checkpoint: CycleCheckpoint):
+        """Run the cycle's stages, skipping those the checkpoint records as done."""
+        # 1. Fetch news data
+        if checkpoint.is_complete('news'):
+            news_data = checkpoint.load_frame('news')
+        else:
+            with self._stage('news'):
+                logger.info("Fetching news data...")
+                news_data = self.news_fetcher.get_latest_news()
+                
+                if news_data.empty:
+                    raise Exception("No news data retrieved")
+                checkpoint.save_frame('news', news_data)
             
-            # 6. Send performance update
-            print("Sending performance update...")
+        # 2. Analyze sentiment
+        if checkpoint.is_complete('sentiment'):
+            sentiment_results = checkpoint.load_frame('sentiment')
+        else:
+            with self._stage('sentiment'):
+                logger.info("Analyzing sentiment...")
+                sentiment_results = self.sentiment_analyzer.analyze_news_sentiment(news_data)
+                checkpoint.save_frame('sentiment', sentiment_results)
+        
+        # 3. Generate trading signals for every strategy from the shared sentiment,
+        # including strategies added since the checkpointed signals were saved
+        strategy_signals = checkpoint.load_json('signals') if checkpoint.is_complete('signals') else {}
+        missing = [strategy for strategy in self.strategies if strategy.name not in strategy_signals]
+        if missing:
+            with self._stage('signals'):
+                logger.info("Generating trading signals...")
+                signal_frame = self.sentiment_analyzer.get_signal_frame(sentiment_results)
+                strategy_signals.update({
+                    strategy.name: self.sentiment_analyzer.rank_signals(
+                        signal_frame, strategy.weights, strategy.top_n, strategy.bottom_n
+                    )
+                    for strategy in missing
+                })
+                checkpoint.save_json('signals', strategy_signals)
+        
+        # 4. Execute trades for all strategies in parallel, skipping orders
+        # already sent by an interrupted run. Each task runs in a copy of the
+        # current context so its log records keep the cycle ID.
+        with ThreadPoolExecutor(max_workers=config.STRATEGY_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    copy_context().run, self._execute_strategy,
+                    trader, strategy_signals[trader.strategy.name], checkpoint
+                )
+                for trader in self.traders
+            ]
+            for future in futures:
+                future.result()
+        
+        # 5. Generate and send performance reports
+        with self._stage('report'):
+            logger.info("Generating performance reports...")
+            stats = {
+                strategy.name: self._generate_report(strategy)
+                for strategy in self.strategies
+                if os.path.exists(strategy.trade_history_file)
+            }
+        
+        # 6. Send performance update
+        with self._stage('notify'):
+            logger.info("Sending performance update...")
             self.notifier.send_performance_update(
-                pd.DataFrame([stats]).to_string()
+                pd.DataFrame.from_dict(stats, orient='index').to_string()
             )
-            
-            print("Trading cycle completed successfully")
-            
-        except Exception as e:
-            error_message = f"Error in trading cycle: {str(e)}"
-            print(error_message)
-            self.notifier.send_error_notification(error_message)
+        
+        checkpoint.mark_cycle_complete()
+        logger.info("Trading cycle completed successfully")
             
     def run(self):
         """Run the trading bot with scheduled execution."""
-        print("Starting Crypto Trading Bot...")
+        logger.info("Starting Crypto Trading Bot...")
         
-        # Schedule weekly execution (every Monday at 00:00)
-        schedule.every().monday.at("00:00").do(self.execute_trading_cycle)
+        scheduler = AsyncScheduler()
         
-        # Execute one cycle immediately on startup
-        self.execute_trading_cycle()
+        # Trading cycle runs on startup the first time, then every interval
+        scheduler.add_job(
+            'trading_cycle',
+            self.profile_trading_cycle if self.profile else self.execute_trading_cycle,
+            interval_seconds=config.TRADING_CYCLE_INTERVAL_HOURS * 3600,
+            jitter_seconds=config.SCHEDULER_JITTER_SECONDS,
+            run_immediately=True,
+            retry_seconds=config.TRADING_CYCLE_RETRY_MINUTES * 60
+        )
         
-        # Keep the script running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check schedule every minute
+        # Stop-loss and take-profit checks between cycles, either streamed or polled
+        feed = create_price_feed()
+        risk_monitor = RiskMonitor(self.traders, feed) if feed else None
+        
+        if risk_monitor is None:
+            scheduler.add_job(
+                'risk_check',
+                self.check_risk_limits,
+                interval_seconds=config.RISK_CHECK_INTERVAL_SECONDS,
+                jitter_seconds=min(config.SCHEDULER_JITTER_SECONDS, config.RISK_CHECK_INTERVAL_SECONDS / 10),
+                run_immediately=True,
+                catch_up=False
+            )
+        
+        asyncio.run(self._run_async(scheduler, risk_monitor))
+        
+    async def _run_async(self, scheduler: AsyncScheduler, risk_monitor: RiskMonitor = None):
+        """Run the scheduler and the streaming risk monitor side by side."""
+        tasks = [scheduler.run()]
+        if risk_monitor:
+            tasks.append(risk_monitor.run())
+        await asyncio.gather(*tasks)
 
 def setup_data_directory():
     """Create necessary directories if they don't exist."""
@@ -83,19 +237,27 @@ def setup_data_directory():
     os.makedirs('data/reports', exist_ok=True)
 
 if __name__ == "__main__":
-    # Setup directories
+    parser = argparse.ArgumentParser(description='Run the crypto news trading bot')
+    parser.add_argument(
+        '--profile', action='store_true',
+        help='Profile each trading cycle and write a flamegraph and hot-function report to data/reports'
+    )
+    args = parser.parse_args()
+    
+    # Setup directories and logging
     setup_data_directory()
+    setup_logging()
     
     # Create and run the trading bot
-    bot = CryptoTradingBot()
+    bot = CryptoTradingBot(profile=args.profile)
     
     try:
         bot.run()
     except KeyboardInterrupt:
-        print("\nStopping Crypto Trading Bot...")
+        logger.info("Stopping Crypto Trading Bot...")
     except Exception as e:
         error_message = f"Critical error: {str(e)}"
-        print(error_message)
+        logger.exception(error_message)
         
         # Send error notification
         notifier = EmailNotifier()
@@ -1,5 +1,6 @@
 import sys
 import os
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -7,6 +8,9 @@ from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from logs import get_recent_logs
+
+logger = logging.getLogger(__name__)
 
 class EmailNotifier:
     def __init__(self):
@@ -17,7 +21,9 @@ class EmailNotifier:
         self.smtp_port = config.SMTP_PORT
         
     def _send_email(self, subject: str, body: str):
-        """Send an email using SMTP."""
+        """Send an email using SMTP, marking the subject during paper trading."""
+        if config.EXCHANGE_MODE == 'paper':
+            subject = f"[PAPER] {subject}"
         try:
             # Create message
             message = MIMEMultipart()
@@ -35,11 +41,15 @@ class EmailNotifier:
                 server.send_message(message)
                 
         except Exception as e:
-            print(f"Error sending email: {str(e)}")
+            logger.error("Error sending email: %s", e)
             
     def send_trade_notification(self, symbol: str, action: str, amount_usd: float, price: float):
         """Send a notification about an upcoming trade."""
         subject = f"Crypto Trade Alert: {action.upper()} {symbol}"
+        if config.EXCHANGE_MODE == 'paper':
+            execution = "This trade will be simulated on the paper exchange; no real order is placed."
+        else:
+            execution = "This trade will be executed shortly."
         
         body = f"""
         Trade Details:
@@ -50,13 +60,13 @@ class EmailNotifier:
         Price: ${price:.2f}
         Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
-        This trade will be executed shortly.
+        {execution}
         """
         
         self._send_email(subject, body)
         
     def send_error_notification(self, error_message: str):
-        """Send a notification about an error."""
+        """Send a notification about an error, with the most recent log events attached."""
         subject = "Crypto Trading Bot Error Alert"
         
         body = f"""
@@ -68,6 +78,10 @@ class EmailNotifier:
         Please check the system and take necessary action.
         """
         
+        recent_logs = get_recent_logs(config.LOG_ERROR_EMAIL_EVENTS)
+        if recent_logs:
+            body += f"\nRecent Events:\n--------------\n{recent_logs}\n"
+        
         self._send_email(subject, body)
         
     def send_performance_update(self, portfolio_summary: str):
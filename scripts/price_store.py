@@ -0,0 +1,177 @@
+import sys
+import os
+import argparse
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+BAR_DTYPE = np.dtype([
+    ('timestamp', '<i8'),  # Nanoseconds since epoch
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8')
+])
+
+def _to_nanoseconds(timestamp) -> int:
+    return pd.Timestamp(timestamp).value
+
+# One lock per symbol file, shared by every store in the process (each trader has its own)
+_file_locks = defaultdict(threading.Lock)
+_file_locks_guard = threading.Lock()
+
+def _file_lock(path: str) -> threading.Lock:
+    with _file_locks_guard:
+        return _file_locks[os.path.abspath(path)]
+
+class PriceHistoryStore:
+    """Per-symbol price bars kept in append-only binary files read through np.memmap.
+
+    Each symbol is one flat file of BAR_DTYPE records sorted by timestamp. New
+    bars are appended in place; out-of-order bars trigger a merge rewrite. Range
+    and as-of lookups binary-search the memory-mapped timestamp column and return
+    views, so readers never copy or parse the whole history.
+    """
+
+    def __init__(self, root: str = config.PRICE_HISTORY_DIR):
+        self.root = root
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, f'{symbol.upper()}.bin')
+
+    def symbols(self) -> List[str]:
+        """List symbols that have stored history."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith('.bin'))
+
+    def bars(self, symbol: str) -> np.ndarray:
+        """Get all bars for a symbol as a read-only memory map."""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        # A crash mid-append can leave a partial record; ignore it
+        count = os.path.getsize(path) // BAR_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(count,))
+
+    def append(self, symbol: str, bars: np.ndarray):
+        """Store bars, appending in place when they are newer than the stored history."""
+        if len(bars) == 0:
+            return
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order='timestamp', kind='stable')
+        os.makedirs(self.root, exist_ok=True)
+
+        path = self._path(symbol)
+        with _file_lock(path):
+            existing = self.bars(symbol)
+
+            if len(existing) == 0 or existing['timestamp'][-1] < bars['timestamp'][0]:
+                with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                    f.seek(len(existing) * BAR_DTYPE.itemsize)
+                    f.truncate()
+                    bars.tofile(f)
+                return
+
+            # Out of order or overlapping: merge, keeping the newest bar per timestamp
+            merged = np.concatenate([np.array(existing), bars])
+            _, last = np.unique(merged['timestamp'][::-1], return_index=True)
+            merged = merged[len(merged) - 1 - last]
+            del existing
+
+            tmp_path = path + '.tmp'
+            merged.tofile(tmp_path)
+            os.replace(tmp_path, path)
+
+    def record_quote(self, symbol: str, price: float, timestamp=None):
+        """Store a single spot quote as a bar with open = high = low = close."""
+        bar = np.array(
+            [(_to_nanoseconds(timestamp or pd.Timestamp.now()), price, price, price, price, np.nan)],
+            dtype=BAR_DTYPE
+        )
+        self.append(symbol, bar)
+
+    def append_frame(self, symbol: str, df: pd.DataFrame):
+        """Store a DataFrame with a timestamp column and close (or price) and optional OHLCV columns."""
+        close = df['close'] if 'close' in df else df['price']
+        bars = np.empty(len(df), dtype=BAR_DTYPE)
+        bars['timestamp'] = pd.to_datetime(df['timestamp']).to_numpy('datetime64[ns]').astype(np.int64)
+        bars['close'] = close.to_numpy(dtype=float)
+        for field in ('open', 'high', 'low'):
+            bars[field] = df[field].to_numpy(dtype=float) if field in df else bars['close']
+        bars['volume'] = df['volume'].to_numpy(dtype=float) if 'volume' in df else np.nan
+        self.append(symbol, bars)
+
+    def import_csv(self, path: str, symbol: Optional[str] = None) -> int:
+        """Bulk-import a CSV of bars, either for one symbol or with a symbol column."""
+        df = pd.read_csv(path)
+        df.columns = [column.strip().lower() for column in df.columns]
+        if 'timestamp' not in df:
+            df = df.rename(columns={'date': 'timestamp', 'time': 'timestamp'})
+
+        if symbol:
+            self.append_frame(symbol, df)
+        else:
+            for group_symbol, group in df.groupby('symbol'):
+                self.append_frame(group_symbol, group)
+        return len(df)
+
+    def range(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """Get bars with start <= timestamp <= end as a zero-copy view."""
+        bars = self.bars(symbol)
+        timestamps = bars['timestamp']
+        lo = 0 if start is None else np.searchsorted(timestamps, _to_nanoseconds(start), side='left')
+        hi = len(bars) if end is None else np.searchsorted(timestamps, _to_nanoseconds(end), side='right')
+        return bars[lo:hi]
+
+    def asof(self, symbol: str, timestamp=None, field: str = 'close') -> Optional[float]:
+        """Get the last known value at or before a timestamp (default: latest)."""
+        bars = self.bars(symbol)
+        if len(bars) == 0:
+            return None
+        if timestamp is None:
+            return float(bars[field][-1])
+
+        position = np.searchsorted(bars['timestamp'], _to_nanoseconds(timestamp), side='right') - 1
+        return float(bars[field][position]) if position >= 0 else None
+
+    def series(self, symbol: str, start=None, end=None, field: str = 'close') -> pd.Series:
+        """Get one field over a time range as a Series."""
+        bars = self.range(symbol, start, end)
+        return pd.Series(
+            bars[field],
+            index=pd.to_datetime(bars['timestamp']),
+            name=symbol
+        )
+
+    def daily_closes(self, symbols: Iterable[str], start=None, end=None) -> pd.DataFrame:
+        """Get the last close per day for each symbol, one column per symbol."""
+        closes = {}
+        for symbol in symbols:
+            series = self.series(symbol, start, end)
+            if not series.empty:
+                closes[symbol] = series.groupby(series.index.normalize()).last()
+        return pd.DataFrame(closes)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Inspect or import local price history')
+    parser.add_argument('csv', nargs='?', help='CSV of bars to import')
+    parser.add_argument('--symbol', help='Symbol for a CSV without a symbol column')
+    args = parser.parse_args()
+
+    store = PriceHistoryStore()
+    if args.csv:
+        print(f"Imported {store.import_csv(args.csv, args.symbol)} rows from {args.csv}")
+
+    for symbol in store.symbols():
+        bars = store.bars(symbol)
+        print(f"{symbol}: {len(bars)} bars from {pd.Timestamp(bars['timestamp'][0])} "
+              f"to {pd.Timestamp(bars['timestamp'][-1])}, last close {bars['close'][-1]:.2f}")
@@ -0,0 +1,187 @@
+import sys
+import os
+import logging
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class CycleProfiler:
+    """Low-overhead sampling profiler with per-stage tracemalloc peaks.
+
+    A daemon thread snapshots every thread's stack with sys._current_frames()
+    each interval, so time spent waiting on the network shows up next to CPU
+    time. Stacks are counted as tuples of code objects and only turned into
+    names when the report is written; stacks that never pass through the bot's
+    own code (idle pool workers, the log listener) are left out. Peak memory is process-wide, so stages
+    that run in parallel (per-strategy trades) share their peaks. Tracing memory
+    slows Python code down several-fold, so it is off by default and the report
+    notes when timings were taken under it.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = config.PROFILE_SAMPLE_INTERVAL_MS,
+        trace_memory: bool = config.PROFILE_TRACE_MEMORY
+    ):
+        self.interval = interval_ms / 1000
+        self.trace_memory = trace_memory
+        self.samples = Counter()  # (thread name, code objects root first) -> count
+        self.stages: Dict[str, Dict] = {}
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()  # Parallel stages finish on different threads
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.traced_memory = tracemalloc.is_tracing()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def __enter__(self) -> 'CycleProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record a stage's duration and its peak traced memory."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            start_current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = {'seconds': time.perf_counter() - start}
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                stats.update(
+                    peak_mb=peak / 2 ** 20,
+                    retained_mb=(current - start_current) / 2 ** 20
+                )
+            with self._lock:
+                self.stages[name] = stats
+
+    def _project_samples(self):
+        """Samples whose stack includes at least one frame from the project."""
+        project_codes = {}
+        for (thread_name, stack), count in self.samples.items():
+            if any(
+                project_codes.setdefault(code, code.co_filename.startswith(PROJECT_DIR))
+                for code in stack
+            ):
+                yield thread_name, stack, count
+
+    def folded(self) -> List[str]:
+        """Collapsed stacks ('thread;outer;...;inner count'), as read by flamegraph tools."""
+        lines = Counter()
+        for thread_name, stack, count in self._project_samples():
+            lines[';'.join([thread_name] + [_frame_label(code) for code in stack])] += count
+        return [f'{stack} {count}' for stack, count in sorted(lines.items())]
+
+    def hot_functions(self, top_n: int = config.PROFILE_TOP_N) -> pd.DataFrame:
+        """Functions ranked by samples where they were running (self) or on the stack (total)."""
+        self_counts = Counter()
+        total_counts = Counter()
+        for _, stack, count in self._project_samples():
+            self_counts[stack[-1]] += count
+            for code in set(stack):
+                total_counts[code] += count
+
+        df = pd.DataFrame({
+            'function': [_frame_label(code) for code in total_counts],
+            'self_samples': [self_counts.get(code, 0) for code in total_counts],
+            'total_samples': list(total_counts.values())
+        })
+        if df.empty:
+            return df
+        # Under load the sampler wakes up late, so derive the time per sample from the run
+        seconds_per_sample = self.elapsed / max(self.sample_count, 1)
+        df['self_seconds'] = df['self_samples'] * seconds_per_sample
+        df['total_seconds'] = df['total_samples'] * seconds_per_sample
+        return df.sort_values(['self_samples', 'total_samples'], ascending=False).head(top_n).reset_index(drop=True)
+
+    def write_report(self, output_dir: str = config.REPORTS_DIR, name: str = None) -> Dict[str, str]:
+        """Write the folded stacks, hot functions and stage table; return their paths."""
+        os.makedirs(output_dir, exist_ok=True)
+        name = name or f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        paths = {
+            'folded': os.path.join(output_dir, f'{name}.folded'),
+            'hot_functions': os.path.join(output_dir, f'{name}_hot_functions.csv'),
+            'stages': os.path.join(output_dir, f'{name}_stages.csv')
+        }
+
+        with open(paths['folded'], 'w') as f:
+            f.write('\n'.join(self.folded()) + '\n')
+
+        hot_functions = self.hot_functions()
+        hot_functions.to_csv(paths['hot_functions'], index=False)
+        pd.DataFrame.from_dict(self.stages, orient='index').rename_axis('stage').to_csv(paths['stages'])
+
+        logger.info(
+            "Profiled %.1fs with %d samples%s, report in %s\n%s",
+            self.elapsed, self.sample_count,
+            ' under tracemalloc (Python code runs slower than without it)' if self.traced_memory else '',
+            paths['folded'], hot_functions.head(10).to_string(index=False)
+        )
+        return paths
+
+if __name__ == "__main__":
+    # Profile a small CPU and wait workload
+    def busy():
+        return sum(i * i for i in range(2_000_000))
+
+    with CycleProfiler(interval_ms=1) as profiler:
+        with profiler.stage('compute'):
+            busy()
+        with profiler.stage('wait'):
+            time.sleep(0.2)
+
+    print(f"\n{profiler.sample_count} samples in {profiler.elapsed:.2f}s")
+    print(profiler.hot_functions(10).to_string(index=False))
+    print(pd.DataFrame.from_dict(profiler.stages, orient='index'))
@@ -0,0 +1,232 @@
+import sys
+import os
+import logging
+import json
+import asyncio
+import heapq
+import time
+import pandas as pd
+from typing import AsyncIterator, Dict, Iterable, List, Set, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+PositionKey = Tuple[int, int]  # (trader number, trade history index)
+
+class ReplayPriceFeed:
+    """Replays ticks from a CSV file with timestamp, symbol and price columns."""
+
+    def __init__(self, path: str, speed: float = 0.0):
+        self.path = path
+        self.speed = speed  # 0 replays as fast as possible, 1 in real time
+
+    def subscribe(self, symbols: Iterable[str]):
+        """Replay files contain every symbol, nothing to subscribe to."""
+
+    async def stream(self) -> AsyncIterator[Tuple[str, float]]:
+        ticks = pd.read_csv(self.path)
+        timestamps = pd.to_datetime(ticks['timestamp'])
+        previous = None
+
+        for timestamp, symbol, price in zip(timestamps, ticks['symbol'], ticks['price']):
+            if self.speed > 0 and previous is not None:
+                await asyncio.sleep(max((timestamp - previous).total_seconds(), 0) / self.speed)
+            else:
+                await asyncio.sleep(0)  # Let exit orders run between ticks
+            previous = timestamp
+            yield symbol, float(price)
+
+class CoinbaseTickerFeed:
+    """Streams trade prices from the Coinbase websocket ticker channel."""
+
+    def __init__(self, url: str = config.COINBASE_WS_URL):
+        self.url = url
+        self.symbols: Set[str] = set()
+        self._websocket = None
+
+    def _subscribe_message(self, symbols: Iterable[str]) -> str:
+        return json.dumps({
+            'type': 'subscribe',
+            'product_ids': [f'{symbol}-USD' for symbol in sorted(symbols)],
+            'channels': ['ticker']
+        })
+
+    def subscribe(self, symbols: Iterable[str]):
+        """Add symbols to the subscription, sending it right away if connected."""
+        new_symbols = set(symbols) - self.symbols
+        if not new_symbols:
+            return
+        self.symbols |= new_symbols
+
+        if self._websocket is not None:
+            asyncio.ensure_future(self._websocket.send(self._subscribe_message(new_symbols)))
+
+    async def stream(self) -> AsyncIterator[Tuple[str, float]]:
+        import websockets
+
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as websocket:
+                    self._websocket = websocket
+                    if self.symbols:
+                        await websocket.send(self._subscribe_message(self.symbols))
+                    backoff = 1
+
+                    async for message in websocket:
+                        data = json.loads(message)
+                        if data.get('type') != 'ticker' or 'price' not in data:
+                            continue
+                        yield data['product_id'].split('-')[0], float(data['price'])
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ticker connection error, reconnecting in %ss: %s", backoff, e)
+            finally:
+                self._websocket = None
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+class RiskMonitor:
+    """Fires stop-loss and take-profit exits as soon as a tick crosses a threshold.
+
+    Thresholds are kept per symbol in two heaps, a max-heap of stop prices and a
+    min-heap of take-profit prices, so a tick only looks at the nearest threshold
+    on each side and each exit costs O(log n). Closed positions are dropped lazily.
+    Positions of several traders (one per strategy) share the same heaps, keyed
+    by (trader number, trade history index).
+    """
+
+    def __init__(self, traders, feed):
+        self.traders = traders if isinstance(traders, list) else [traders]
+        self.feed = feed
+        self._stops: Dict[str, List[Tuple[float, PositionKey]]] = {}
+        self._targets: Dict[str, List[Tuple[float, PositionKey]]] = {}
+        self._open: Dict[PositionKey, str] = {}  # Position -> symbol
+        self._pending: Set[PositionKey] = set()
+        self._tasks = set()
+
+    def add_position(self, key: PositionKey, symbol: str, purchase_price: float):
+        """Index a position's stop-loss and take-profit prices."""
+        if key in self._open or key in self._pending:
+            return
+        strategy = self.traders[key[0]].strategy
+        stop_price = purchase_price * (1 - strategy.stop_loss / 100)
+        target_price = purchase_price * (1 + strategy.take_profit / 100)
+
+        heapq.heappush(self._stops.setdefault(symbol, []), (-stop_price, key))
+        heapq.heappush(self._targets.setdefault(symbol, []), (target_price, key))
+        self._open[key] = symbol
+
+    def remove_position(self, key: PositionKey):
+        """Stop tracking a position; its heap entries are skipped when reached."""
+        self._open.pop(key, None)
+
+    def sync_positions(self):
+        """Pick up positions opened or closed outside the monitor."""
+        open_keys = set()
+        for number, trader in enumerate(self.traders):
+            positions = trader.get_open_positions()
+            for index, symbol, price in zip(positions.index, positions['symbol'], positions['price']):
+                key = (number, int(index))
+                open_keys.add(key)
+                self.add_position(key, symbol, float(price))
+
+        for key in list(self._open):
+            if key not in open_keys:
+                self.remove_position(key)
+
+        self.feed.subscribe(set(self._open.values()))
+
+    def _pop_crossed(self, heap: List[Tuple[float, PositionKey]], crossed) -> List[PositionKey]:
+        triggered = []
+        while heap:
+            threshold, key = heap[0]
+            if key not in self._open:
+                heapq.heappop(heap)
+            elif crossed(threshold):
+                heapq.heappop(heap)
+                triggered.append(key)
+            else:
+                break
+        return triggered
+
+    def on_tick(self, symbol: str, price: float) -> List[PositionKey]:
+        """Return positions whose stop-loss or take-profit was crossed by this tick."""
+        triggered = self._pop_crossed(self._stops.get(symbol, []), lambda threshold: -threshold >= price)
+        triggered += self._pop_crossed(self._targets.get(symbol, []), lambda threshold: price >= threshold)
+
+        for key in triggered:
+            self.remove_position(key)
+        return triggered
+
+    async def _exit(self, key: PositionKey, price: float, tick_time: float):
+        """Close a position on a worker thread so the feed keeps flowing."""
+        number, index = key
+        trader = self.traders[number]
+        try:
+            order = await asyncio.to_thread(trader.close_position, index, price)
+            latency_ms = (time.perf_counter() - tick_time) * 1000
+            if order is not None:
+                logger.info(
+                    "Risk exit for trade %s at $%.2f", index, price,
+                    extra={'strategy': trader.strategy.name, 'symbol': trader.trade_history.at[index, 'symbol'],
+                           'latency_ms': latency_ms}
+                )
+        except Exception as e:
+            logger.error("Error closing position %s: %s", index, e, extra={'strategy': trader.strategy.name})
+        finally:
+            # A failed exit is picked up again on the next sync
+            self._pending.discard(key)
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                self.sync_positions()
+            except Exception as e:
+                logger.error("Error syncing positions: %s", e)
+            await asyncio.sleep(config.RISK_MONITOR_SYNC_SECONDS)
+
+    async def run(self):
+        """Consume the price feed until it ends."""
+        self.sync_positions()
+        sync_task = asyncio.create_task(self._sync_loop())
+
+        try:
+            async for symbol, price in self.feed.stream():
+                tick_time = time.perf_counter()
+                for key in self.on_tick(symbol, price):
+                    self._pending.add(key)
+                    task = asyncio.create_task(self._exit(key, price, tick_time))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        finally:
+            sync_task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+
+def create_price_feed():
+    """Create the price feed selected by RISK_MONITOR_FEED, or None for polling."""
+    if config.RISK_MONITOR_FEED == 'coinbase':
+        return CoinbaseTickerFeed()
+    if config.RISK_MONITOR_FEED == 'replay':
+        return ReplayPriceFeed(config.RISK_MONITOR_REPLAY_FILE, config.RISK_MONITOR_REPLAY_SPEED)
+    return None
+
+if __name__ == "__main__":
+    from trade import CryptoTrader
+    from logs import setup_logging
+    
+    setup_logging(log_file=None)
+
+    # Test the risk monitor against a replay file
+    trader = CryptoTrader()
+    feed = ReplayPriceFeed(config.RISK_MONITOR_REPLAY_FILE, config.RISK_MONITOR_REPLAY_SPEED)
+    monitor = RiskMonitor(trader, feed)
+
+    print(f"Monitoring {len(trader.get_open_positions())} open positions")
+    asyncio.run(monitor.run())
@@ -0,0 +1,223 @@
+import sys
+import os
+import logging
+import json
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+class JobFailedError(Exception):
+    """Raised by a job that has already logged and reported its error.
+
+    The scheduler treats it as a failed run but logs it without a traceback.
+    """
+
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        interval_seconds: float,
+        jitter_seconds: float = 0.0,
+        run_immediately: bool = False,
+        catch_up: bool = True,
+        retry_seconds: Optional[float] = None
+    ):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.run_immediately = run_immediately
+        self.catch_up = catch_up
+        self.retry_seconds = retry_seconds
+        self.retry_pending = False  # Next run is a retry, not the regular slot
+        self.last_run: Optional[float] = None
+        self.base_run: float = 0.0  # Deadline without jitter, keeps the cadence from drifting
+        self.next_run: float = 0.0
+        self.running = False
+
+    def schedule(self, base_run: float):
+        """Set the next deadline, adding a random jitter on top of the base slot."""
+        self.base_run = base_run
+        self.next_run = base_run + random.uniform(0, self.jitter_seconds)
+
+class AsyncScheduler:
+    def __init__(self, state_file: str = config.SCHEDULER_STATE_FILE):
+        self.state_file = state_file
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable,
+        interval_seconds: float,
+        jitter_seconds: float = 0.0,
+        run_immediately: bool = False,
+        catch_up: bool = True,
+        retry_seconds: Optional[float] = None
+    ) -> ScheduledJob:
+        """Register a job to run every `interval_seconds`.
+
+        Sync functions run in a worker thread, coroutine functions on the loop.
+        A run that raises is not recorded; with `retry_seconds` it is retried
+        that much later (if before the next regular slot), keeping the cadence.
+        """
+        job = ScheduledJob(name, func, interval_seconds, jitter_seconds, run_immediately, catch_up, retry_seconds)
+        self.jobs[name] = job
+        return job
+
+    def _load_state(self) -> Dict[str, float]:
+        """Load the last completed run time of each job."""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error("Error loading scheduler state: %s", e)
+            return {}
+
+    def _save_state(self):
+        """Persist the last run time of each job so missed runs can be caught up."""
+        state = {
+            name: job.last_run
+            for name, job in self.jobs.items()
+            if job.last_run is not None
+        }
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            with open(self.state_file, 'w') as f:
+                json.dump(state, f)
+        except Exception as e:
+            logger.error("Error saving scheduler state: %s", e)
+
+    def _next_slot(self, job: ScheduledJob, base_run: float, now: float) -> float:
+        """Advance a base deadline past `now` in whole intervals."""
+        if base_run > now:
+            return base_run
+        missed = int((now - base_run) // job.interval_seconds) + 1
+        return base_run + missed * job.interval_seconds
+
+    def _initialize_jobs(self):
+        """Compute first deadlines, catching up runs missed during downtime."""
+        state = self._load_state()
+        now = time.time()
+
+        for name, job in self.jobs.items():
+            job.last_run = state.get(name)
+
+            if job.last_run is None:
+                job.schedule(now if job.run_immediately else now + job.interval_seconds)
+                continue
+
+            due = job.last_run + job.interval_seconds
+            if due <= now:
+                if job.catch_up:
+                    # Missed one or more runs while down: run once now, not once per slot
+                    logger.info("Catching up missed run of %s (last run %s)", name, datetime.fromtimestamp(job.last_run))
+                    job.schedule(now)
+                else:
+                    job.schedule(self._next_slot(job, due, now))
+            else:
+                job.schedule(due)
+
+    async def _run_job(self, job: ScheduledJob, started_at: float):
+        """Run a job once and record its completion."""
+        try:
+            if asyncio.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.to_thread(job.func)
+            job.last_run = started_at
+            self._save_state()
+            logger.debug("Finished job %s", job.name, extra={'latency_ms': (time.time() - started_at) * 1000})
+        except Exception as e:
+            if isinstance(e, JobFailedError):
+                logger.warning("Scheduled job %s failed: %s", job.name, e)
+            else:
+                logger.exception("Error in scheduled job %s: %s", job.name, e)
+            if job.retry_seconds is not None:
+                retry_at = time.time() + job.retry_seconds
+                if retry_at < job.next_run:
+                    logger.info("Retrying %s at %s", job.name, datetime.fromtimestamp(retry_at))
+                    job.next_run = retry_at
+                    job.retry_pending = True
+        finally:
+            job.running = False
+            self._wakeup.set()
+
+    def _dispatch_due_jobs(self):
+        """Start every job whose deadline has passed and schedule its next slot."""
+        now = time.time()
+
+        for job in self.jobs.values():
+            if job.next_run > now:
+                continue
+
+            if job.running:
+                logger.warning("Skipping %s: previous run is still in progress", job.name)
+            else:
+                job.running = True
+                task = asyncio.create_task(self._run_job(job, now))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            # A retry runs ahead of the regular slot, which stays scheduled
+            base_run = job.base_run if job.retry_pending else job.base_run + job.interval_seconds
+            job.retry_pending = False
+            job.schedule(self._next_slot(job, base_run, now))
+
+    async def run(self):
+        """Run the event loop until `stop` is called."""
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+        self._initialize_jobs()
+
+        while not self._stopped:
+            self._dispatch_due_jobs()
+
+            if not self.jobs:
+                await self._wakeup.wait()
+            else:
+                # Sleep exactly until the earliest deadline instead of polling
+                delay = min(job.next_run for job in self.jobs.values()) - time.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+            self._wakeup.clear()
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self):
+        """Stop the scheduler after in-flight jobs finish."""
+        self._stopped = True
+        if self._wakeup:
+            self._wakeup.set()
+
+if __name__ == "__main__":
+    from logs import setup_logging
+    
+    setup_logging(log_file=None)
+    
+    # Test the scheduler with two short cadences
+    scheduler = AsyncScheduler(state_file=os.path.join(config.DATA_DIR, 'scheduler_test_state.json'))
+    scheduler.add_job('fast', lambda: print(f"fast tick {datetime.now()}"), 2, jitter_seconds=0.5, run_immediately=True)
+    scheduler.add_job('slow', lambda: time.sleep(7), 5, run_immediately=True)
+
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        print("\nStopping scheduler...")
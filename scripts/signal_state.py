@@ -0,0 +1,143 @@
+import sys
+import os
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_COLUMNS = config.SENTIMENT_CATEGORIES + ['composite_score']
+NANOSECONDS_PER_DAY = 86400 * 10**9
+
+class RollingSignalState:
+    """Per-symbol exponentially weighted sentiment scores with time decay.
+
+    Each observation moves a symbol's state towards the new scores by
+    1 - 0.5 ** (elapsed / half_life), so updates are O(1) and irregular gaps
+    between cycles are weighted correctly. State lives in flat NumPy arrays
+    and is persisted as a single .npz file.
+    """
+
+    def __init__(self, half_life_days: float = config.SIGNAL_HALF_LIFE_DAYS):
+        self.half_life_days = half_life_days
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.values = np.zeros((8, len(SIGNAL_COLUMNS)))
+        self.last_update = np.zeros(8, dtype=np.int64)  # Nanoseconds since epoch
+        self.counts = np.zeros(8, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _slot(self, symbol: str) -> int:
+        """Get a symbol's row, growing the arrays geometrically for new symbols."""
+        slot = self._index.get(symbol)
+        if slot is not None:
+            return slot
+
+        slot = len(self.symbols)
+        if slot == len(self.counts):
+            capacity = 2 * len(self.counts)
+            self.values = np.resize(self.values, (capacity, len(SIGNAL_COLUMNS)))
+            self.last_update = np.resize(self.last_update, capacity)
+            self.counts = np.resize(self.counts, capacity)
+            self.counts[slot:] = 0
+
+        self.symbols.append(symbol)
+        self._index[symbol] = slot
+        return slot
+
+    def update(self, symbol: str, scores: np.ndarray, timestamp: int) -> bool:
+        """Fold one observation into a symbol's state.
+
+        Observations not newer than the last applied one are ignored, so
+        replaying the same sentiment results (e.g. a resumed cycle) is harmless.
+        """
+        slot = self._slot(symbol)
+
+        if self.counts[slot] == 0:
+            self.values[slot] = scores
+        elif timestamp <= self.last_update[slot]:
+            return False
+        else:
+            elapsed_days = (timestamp - self.last_update[slot]) / NANOSECONDS_PER_DAY
+            decay = 0.5 ** (elapsed_days / self.half_life_days)
+            self.values[slot] = decay * self.values[slot] + (1 - decay) * scores
+
+        self.last_update[slot] = timestamp
+        self.counts[slot] += 1
+        return True
+
+    def update_frame(self, sentiment_df: pd.DataFrame) -> int:
+        """Fold every row of a sentiment DataFrame into the state in timestamp order."""
+        if sentiment_df.empty:
+            return 0
+
+        timestamps = pd.to_datetime(sentiment_df['timestamp']).to_numpy('datetime64[ns]').astype(np.int64)
+        scores = sentiment_df[SIGNAL_COLUMNS].to_numpy(dtype=float)
+        order = np.argsort(timestamps, kind='stable')
+
+        return sum(
+            self.update(symbol, scores[i], timestamps[i])
+            for i, symbol in zip(order, sentiment_df['symbol'].to_numpy()[order])
+        )
+
+    def to_frame(self, max_age_days: Optional[float] = None) -> pd.DataFrame:
+        """Get the smoothed scores per symbol, optionally dropping stale symbols."""
+        n = len(self.symbols)
+        df = pd.DataFrame(self.values[:n], columns=SIGNAL_COLUMNS)
+        df.insert(0, 'symbol', self.symbols)
+        df['last_update'] = pd.to_datetime(self.last_update[:n])
+        df['observations'] = self.counts[:n]
+
+        if max_age_days is not None:
+            df = df[df['last_update'] >= pd.Timestamp.now() - pd.Timedelta(days=max_age_days)]
+        return df
+
+    def save(self, state_file: str = config.SIGNAL_STATE_FILE):
+        """Persist the state arrays atomically."""
+        n = len(self.symbols)
+        os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+        tmp_path = state_file + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                symbols=np.array(self.symbols, dtype=str),
+                values=self.values[:n],
+                last_update=self.last_update[:n],
+                counts=self.counts[:n]
+            )
+        os.replace(tmp_path, state_file)
+
+    @classmethod
+    def load(cls, state_file: str = config.SIGNAL_STATE_FILE,
+             half_life_days: float = config.SIGNAL_HALF_LIFE_DAYS) -> 'RollingSignalState':
+        """Load persisted state, or start empty if there is none."""
+        state = cls(half_life_days)
+        if not os.path.exists(state_file):
+            return state
+
+        try:
+            with np.load(state_file) as data:
+                symbols = data['symbols'].tolist()
+                for symbol in symbols:
+                    state._slot(symbol)
+                n = len(symbols)
+                state.values[:n] = data['values']
+                state.last_update[:n] = data['last_update']
+                state.counts[:n] = data['counts']
+        except Exception as e:
+            logger.warning("Error loading signal state, starting fresh: %s", e)
+            return cls(half_life_days)
+
+        return state
+
+if __name__ == "__main__":
+    # Show the current smoothed signals
+    state = RollingSignalState.load()
+    print(f"\nRolling signal state for {len(state)} symbols:")
+    print(state.to_frame().sort_values('composite_score', ascending=False).to_string(index=False))
@@ -0,0 +1,223 @@
+import sys
+import os
+import argparse
+import math
+import random
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+from datetime import datetime
+from typing import Dict, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_store import PriceHistoryStore
+
+class APIObject(dict):
+    """Dict with attribute access, shaped like the objects the Coinbase client returns."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for key, value in self.items():
+            if isinstance(value, dict) and not isinstance(value, APIObject):
+                self[key] = APIObject(value)
+            elif isinstance(value, list):
+                self[key] = [APIObject(item) if isinstance(item, dict) else item for item in value]
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+class RateLimitError(Exception):
+    """Raised when the simulated request rate exceeds PAPER_RATE_LIMIT_PER_SECOND."""
+
+class SimulatedExchangeClient:
+    """In-memory stand-in for the subset of coinbase.wallet.client.Client the bot uses.
+
+    Prices start from the local price history (or PAPER_DEFAULT_PRICE) and take a
+    small random step on every quote. Orders fill immediately against in-memory
+    balances with configurable fill ratio, slippage and fees, and every request
+    can be delayed and rate limited like the real API.
+    """
+
+    def __init__(
+        self,
+        starting_usd: float = config.PAPER_STARTING_USD,
+        fee_bps: float = config.PAPER_FEE_BPS,
+        slippage_bps: float = config.PAPER_SLIPPAGE_BPS,
+        fill_ratio: float = config.PAPER_FILL_RATIO,
+        latency_ms: float = config.PAPER_LATENCY_MS,
+        rate_limit_per_second: float = config.PAPER_RATE_LIMIT_PER_SECOND,
+        price_volatility: float = config.PAPER_PRICE_VOLATILITY,
+        seed: Optional[int] = None,
+        price_store: PriceHistoryStore = None
+    ):
+        self.fee_bps = fee_bps
+        self.slippage_bps = slippage_bps
+        self.fill_ratio = fill_ratio
+        self.latency_ms = latency_ms
+        self.rate_limit_per_second = rate_limit_per_second
+        self.price_volatility = price_volatility
+        self.price_store = price_store or PriceHistoryStore()
+        self.balances: Dict[str, float] = {'USD': starting_usd}
+        self.prices: Dict[str, float] = {}
+        self.orders = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit_per_second
+        self._last_refill = time.monotonic()
+
+    def _request(self):
+        """Apply simulated network latency and the request rate limit."""
+        if self.latency_ms > 0:
+            # Exponential jitter around the configured mean, like a real network
+            time.sleep(self._random.expovariate(1000 / self.latency_ms))
+
+        if self.rate_limit_per_second <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate_limit_per_second,
+                self._tokens + (now - self._last_refill) * self.rate_limit_per_second
+            )
+            self._last_refill = now
+            if self._tokens < 1:
+                raise RateLimitError("429 Too Many Requests: rate limit exceeded")
+            self._tokens -= 1
+
+    def _split_pair(self, currency_pair: str):
+        base, _, quote = currency_pair.partition('-')
+        return base.upper(), (quote or 'USD').upper()
+
+    def _price(self, symbol: str) -> float:
+        """Advance and return the simulated price for a symbol."""
+        with self._lock:
+            price = self.prices.get(symbol)
+            if price is None:
+                price = self.price_store.asof(symbol) or config.PAPER_DEFAULT_PRICE
+            else:
+                price *= math.exp(self._random.gauss(0, self.price_volatility))
+            self.prices[symbol] = price
+            return price
+
+    def _account(self, currency: str) -> APIObject:
+        balance = self.balances.get(currency, 0.0)
+        value = balance if currency == 'USD' else balance * self.prices.get(currency, 0.0)
+        return APIObject(
+            id=f'{currency}-USD',
+            currency=currency,
+            balance={'amount': f'{balance:.8f}', 'currency': currency},
+            native_balance={'amount': f'{value:.2f}', 'currency': 'USD'}
+        )
+
+    def _fill(self, side: str, base: str, crypto_amount: float, usd_amount: float, price: float, fee: float) -> APIObject:
+        order = APIObject(
+            id=str(uuid.uuid4()),
+            status='completed',
+            resource=side,
+            created_at=datetime.now().isoformat(),
+            amount={'amount': f'{crypto_amount:.8f}', 'currency': base},
+            subtotal={'amount': f'{usd_amount:.2f}', 'currency': 'USD'},
+            fee={'amount': f'{fee:.2f}', 'currency': 'USD'},
+            unit_price={'amount': f'{price:.8f}', 'currency': 'USD'}
+        )
+        self.orders.append(order)
+        return order
+
+    def get_spot_price(self, currency_pair: str = 'BTC-USD', **kwargs) -> APIObject:
+        """Get the current simulated price."""
+        self._request()
+        base, quote = self._split_pair(currency_pair)
+        return APIObject(base=base, currency=quote, amount=f'{self._price(base):.8f}')
+
+    def buy(self, amount, currency_pair: str = 'BTC-USD', payment_method: str = None, **kwargs) -> APIObject:
+        """Buy `amount` USD worth of the base currency."""
+        self._request()
+        base, _ = self._split_pair(currency_pair)
+        price = self._price(base) * (1 + self.slippage_bps / 10000)
+        usd_amount = float(amount) * self.fill_ratio
+        fee = usd_amount * self.fee_bps / 10000
+
+        with self._lock:
+            if self.balances['USD'] < usd_amount:
+                raise Exception(f"Insufficient funds: {self.balances['USD']:.2f} USD available")
+            crypto_amount = (usd_amount - fee) / price
+            self.balances['USD'] -= usd_amount
+            self.balances[base] = self.balances.get(base, 0.0) + crypto_amount
+            return self._fill('buy', base, crypto_amount, usd_amount, price, fee)
+
+    def sell(self, amount, currency_pair: str = 'BTC-USD', payment_method: str = None, **kwargs) -> APIObject:
+        """Sell `amount` of the base currency for USD."""
+        self._request()
+        base, _ = self._split_pair(currency_pair)
+        price = self._price(base) * (1 - self.slippage_bps / 10000)
+        crypto_amount = float(amount) * self.fill_ratio
+
+        with self._lock:
+            held = self.balances.get(base, 0.0)
+            if held < crypto_amount <= held + 1e-8:
+                crypto_amount = held  # Amounts are reported to 8 decimals, so selling one back may round up
+            if held < crypto_amount:
+                raise Exception(f"Insufficient funds: {held:.8f} {base} available")
+            usd_amount = crypto_amount * price
+            fee = usd_amount * self.fee_bps / 10000
+            self.balances[base] = held - crypto_amount
+            self.balances['USD'] += usd_amount - fee
+            return self._fill('sell', base, crypto_amount, usd_amount, price, fee)
+
+    def get_account(self, account_id: str) -> APIObject:
+        """Get the account for a currency, accepting either 'BTC' or 'BTC-USD'."""
+        self._request()
+        base, _ = self._split_pair(account_id)
+        with self._lock:
+            return self._account(base)
+
+    def get_accounts(self, **kwargs) -> APIObject:
+        """Get every account with a balance record."""
+        self._request()
+        with self._lock:
+            return APIObject(data=[self._account(currency) for currency in self.balances])
+
+class _NullNotifier:
+    """Drops notifications so benchmarks measure the trading path, not SMTP."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the order path against the simulated exchange')
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--symbols', type=int, default=10)
+    args = parser.parse_args()
+
+    # Keep benchmark trades out of the real ledger
+    config.TRADE_HISTORY_FILE = os.path.join(tempfile.mkdtemp(), 'trade_history.csv')
+    config.EXCHANGE_MODE = 'paper'
+
+    from trade import CryptoTrader
+
+    trader = CryptoTrader()
+    trader.notifier = _NullNotifier()
+    trader.client.balances['USD'] = args.orders * config.TRADE_AMOUNT_USD
+    symbols = [f'SIM{i}' for i in range(args.symbols)]
+
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for i in range(args.orders):
+        order_start = time.perf_counter()
+        if trader._place_order(symbols[i % len(symbols)], 'buy', config.TRADE_AMOUNT_USD) is None:
+            failures += 1
+        latencies.append(time.perf_counter() - order_start)
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    print(f"\n{args.orders} orders in {elapsed:.2f}s ({args.orders / elapsed:.1f} orders/s), {failures} failed")
+    print(f"Latency p50 {np.percentile(latencies, 50):.2f}ms, p99 {np.percentile(latencies, 99):.2f}ms")
+    print("\nSimulated Portfolio:")
+    print(trader.get_portfolio_summary())
@@ -0,0 +1,88 @@
+import sys
+import os
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+def _env_credential(entry: Dict, key: str) -> Optional[str]:
+    """Read a credential from the env var a STRATEGIES entry names under `key`.
+
+    Returns None when the entry names no variable, so the strategy uses the
+    main account. A named variable that is unset or empty is an error rather
+    than a silent fallback to the main account.
+    """
+    if key not in entry:
+        return None
+    value = os.getenv(entry[key]) if entry[key] else None
+    if not value:
+        raise ValueError(f"Strategy '{entry['name']}': environment variable {entry[key]!r} ({key}) is not set")
+    return value
+
+class Strategy:
+    """Parameters and account for one trading strategy.
+
+    Every setting falls back to the global configuration, so the 'default'
+    strategy behaves exactly like the single-strategy bot. Other strategies
+    keep their ledger and reports under STRATEGIES_DIR/<name>.
+    """
+
+    def __init__(
+        self,
+        name: str = 'default',
+        weights: Optional[Dict[str, float]] = None,
+        top_n: Optional[int] = None,
+        bottom_n: Optional[int] = None,
+        trade_amount_usd: Optional[float] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None
+    ):
+        self.name = name
+        self.weights = weights or config.COMPOSITE_WEIGHTS
+        self.top_n = top_n if top_n is not None else config.TOP_ENTITIES_TO_BUY
+        self.bottom_n = bottom_n if bottom_n is not None else config.BOTTOM_ENTITIES_TO_SELL
+        self.trade_amount_usd = trade_amount_usd if trade_amount_usd is not None else config.TRADE_AMOUNT_USD
+        self.stop_loss = stop_loss if stop_loss is not None else config.STOP_LOSS_PERCENTAGE
+        self.take_profit = take_profit if take_profit is not None else config.TAKE_PROFIT_PERCENTAGE
+        self.api_key = api_key or config.COINBASE_API_KEY
+        self.api_secret = api_secret or config.COINBASE_API_SECRET
+
+        if name == 'default':
+            self.trade_history_file = config.TRADE_HISTORY_FILE
+            self.reports_dir = config.REPORTS_DIR
+        else:
+            self.trade_history_file = os.path.join(
+                config.STRATEGIES_DIR, name, os.path.basename(config.TRADE_HISTORY_FILE)
+            )
+            self.reports_dir = os.path.join(config.STRATEGIES_DIR, name, 'reports')
+
+    @classmethod
+    def from_config(cls, entry: Dict) -> 'Strategy':
+        """Build a strategy from a STRATEGIES entry, reading API keys from the named env vars.
+
+        Raises ValueError if a named env var is unset.
+        """
+        return cls(
+            name=entry['name'],
+            weights=entry.get('weights'),
+            top_n=entry.get('top_n'),
+            bottom_n=entry.get('bottom_n'),
+            trade_amount_usd=entry.get('trade_amount_usd'),
+            stop_loss=entry.get('stop_loss'),
+            take_profit=entry.get('take_profit'),
+            api_key=_env_credential(entry, 'api_key_env'),
+            api_secret=_env_credential(entry, 'api_secret_env')
+        )
+
+def load_strategies() -> List[Strategy]:
+    """Load the configured strategies, or the single default strategy."""
+    if not config.STRATEGIES:
+        return [Strategy()]
+
+    strategies = [Strategy.from_config(entry) for entry in config.STRATEGIES]
+    names = [strategy.name for strategy in strategies]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Strategy names must be unique: {names}")
+    return strategies
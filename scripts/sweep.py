@@ -0,0 +1,240 @@
+import sys
+import os
+import argparse
+import itertools
+import math
+import random
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from price_store import PriceHistoryStore
+
+# Arrays attached in each worker process, and exit crossings cached per thresholds
+# for the (prices, cycle_day) arrays they were computed from
+_shared = {}
+_segments = []
+_crossings = {}
+_crossing_inputs = None
+
+def load_backtest_inputs(
+    history_file: str = config.SENTIMENT_HISTORY_FILE,
+    price_store: PriceHistoryStore = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """Build the backtest arrays from stored sentiment and price history.
+
+    Returns scores (cycles x symbols x categories), daily closes (days x symbols),
+    the day index of each cycle and the symbol names. Each day with sentiment
+    results counts as one cycle.
+    """
+    price_store = price_store or PriceHistoryStore()
+    sentiment = pd.read_csv(history_file)
+    sentiment['date'] = pd.to_datetime(sentiment['timestamp']).dt.normalize()
+
+    closes = price_store.daily_closes(sentiment['symbol'].unique(), start=sentiment['date'].min())
+    if closes.empty:
+        raise ValueError("No price history for the symbols in the sentiment history")
+    symbols = list(closes.columns)
+    sentiment = sentiment[sentiment['symbol'].isin(symbols)]
+
+    days = pd.date_range(sentiment['date'].min(), max(closes.index.max(), sentiment['date'].max()), freq='D')
+    prices = closes.reindex(days).ffill().to_numpy(dtype=float)
+
+    cycle_dates = np.sort(sentiment['date'].unique())
+    cycle_day = days.get_indexer(cycle_dates)
+    scores = np.full((len(cycle_dates), len(symbols), len(config.SENTIMENT_CATEGORIES)), np.nan)
+
+    grouped = sentiment.groupby(['date', 'symbol'])[config.SENTIMENT_CATEGORIES].mean()
+    cycle_idx = np.searchsorted(cycle_dates, grouped.index.get_level_values('date').to_numpy())
+    symbol_idx = pd.Index(symbols).get_indexer(grouped.index.get_level_values('symbol'))
+    scores[cycle_idx, symbol_idx] = grouped.to_numpy()
+
+    return scores, prices, cycle_day, symbols
+
+def _exit_crossings(prices: np.ndarray, cycle_day: np.ndarray, stop: float, target: float) -> Tuple[np.ndarray, np.ndarray]:
+    """First stop-loss/take-profit crossing for a position opened at each cycle in each symbol.
+
+    Returns the crossing day (len(prices) if never) and the return at that close,
+    both shaped cycles x symbols. For fixed inputs it depends only on the
+    thresholds, so it is cached until called with different arrays.
+    """
+    global _crossing_inputs
+    if _crossing_inputs is None or _crossing_inputs[0] is not prices or _crossing_inputs[1] is not cycle_day:
+        _crossings.clear()
+        _crossing_inputs = (prices, cycle_day)
+
+    key = (stop, target)
+    if key in _crossings:
+        return _crossings[key]
+
+    n_days, n_symbols = prices.shape
+    exit_day = np.full((len(cycle_day), n_symbols), n_days)
+    exit_return = np.zeros((len(cycle_day), n_symbols))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for c, day in enumerate(cycle_day):
+            if day + 1 >= n_days:
+                continue  # Cycle on the last price day: nothing to exit on yet
+            window = prices[day + 1:] / prices[day] - 1
+            crossed = (window <= -stop) | (window >= target)
+            hit = crossed.any(axis=0)
+            first = crossed.argmax(axis=0)
+            exit_day[c, hit] = day + 1 + first[hit]
+            exit_return[c, hit] = window[first[hit], np.flatnonzero(hit)]
+
+    _crossings[key] = exit_day, exit_return
+    return exit_day, exit_return
+
+def backtest(scores: np.ndarray, prices: np.ndarray, cycle_day: np.ndarray, params: Dict) -> Dict:
+    """Replay the strategy for one parameter set.
+
+    Each cycle buys the top_n and sells held positions in the bottom_n symbols
+    by composite score at that day's close. Between cycles, open positions exit
+    at the first daily close beyond the stop-loss or take-profit. Positions are
+    evaluated all at once rather than cycle by cycle. Returns are measured
+    against the capital one cycle deploys (top_n x TRADE_AMOUNT_USD).
+    """
+    n_cycles = len(cycle_day)
+    weights = np.array([params[category] for category in config.SENTIMENT_CATEGORIES])
+    composite = scores @ (weights / weights.sum())
+    amount = config.TRADE_AMOUNT_USD
+
+    # Rank tradable symbols each cycle
+    valid = ~np.isnan(composite) & ~np.isnan(prices[cycle_day])
+    n_valid = valid.sum(axis=1, keepdims=True)
+    rank_desc = np.argsort(np.argsort(np.where(valid, -composite, np.inf), axis=1, kind='stable'), axis=1)
+    rank_asc = np.argsort(np.argsort(np.where(valid, composite, np.inf), axis=1, kind='stable'), axis=1)
+    buys = valid & (rank_desc < np.minimum(params['top_n'], n_valid))
+    sells = valid & (rank_asc < np.minimum(params['bottom_n'], n_valid))
+
+    # Next later cycle in which each symbol is a sell signal
+    sell_cycles = np.where(sells, np.arange(n_cycles)[:, None], n_cycles)
+    next_sell = np.minimum.accumulate(sell_cycles[::-1], axis=0)[::-1]
+    next_sell = np.vstack([next_sell[1:], np.full((1, sells.shape[1]), n_cycles)])
+
+    # One row per position: entry cycle and symbol
+    entry_cycle, symbol = np.nonzero(buys)
+    entry_day = cycle_day[entry_cycle]
+    entry_price = prices[entry_day, symbol]
+
+    stop_day, stop_return = _exit_crossings(prices, cycle_day, params['stop_loss'] / 100, params['take_profit'] / 100)
+    stop_day, stop_return = stop_day[entry_cycle, symbol], stop_return[entry_cycle, symbol]
+
+    sell_cycle = next_sell[entry_cycle, symbol]
+    sold = sell_cycle < n_cycles
+    sell_day = np.where(sold, cycle_day[np.minimum(sell_cycle, n_cycles - 1)], len(prices))
+    sell_return = prices[np.minimum(sell_day, len(prices) - 1), symbol] / entry_price - 1
+
+    # Risk exits on or before the sell day take priority, as they are checked first
+    stopped = stop_day <= sell_day
+    exit_day = np.where(stopped, stop_day, sell_day)
+    exit_return = np.where(stopped, stop_return, sell_return)
+
+    # Mark every position at each cycle and at the final day
+    mark_days = np.append(cycle_day, len(prices) - 1)
+    marks = prices[mark_days][:, symbol].T / entry_price[:, None] - 1
+    values = np.where(exit_day[:, None] <= mark_days, exit_return[:, None], marks)
+    active = entry_cycle[:, None] <= np.arange(n_cycles + 1)
+    equity = amount * np.where(active, values, 0.0).sum(axis=0)
+
+    capital = params['top_n'] * amount
+    returns = np.diff(equity, prepend=0.0) / capital
+    spacing = np.median(np.diff(cycle_day)) if n_cycles > 1 else 7
+    periods_per_year = 365 / max(spacing, 1)
+    volatility = returns.std()
+
+    return {
+        **params,
+        'total_return': equity[-1] / capital,
+        'sharpe': returns.mean() / volatility * np.sqrt(periods_per_year) if volatility > 0 else 0.0,
+        'max_drawdown': (equity - np.maximum.accumulate(equity)).min() / capital,
+        'trades': len(entry_cycle) + int((exit_day < len(prices)).sum())
+    }
+
+def _share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple]:
+    """Copy an array into a new shared memory segment."""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment, (segment.name, array.shape, array.dtype.str)
+
+def _attach(specs: Dict[str, Tuple]):
+    """Worker initializer: map the shared inputs instead of unpickling copies."""
+    for key, (name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=name)
+        _segments.append(segment)
+        _shared[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    _crossings.clear()
+
+def _evaluate(param_chunk: List[Dict]) -> List[Dict]:
+    return [
+        backtest(_shared['scores'], _shared['prices'], _shared['cycle_day'], params)
+        for params in param_chunk
+    ]
+
+def generate_parameters(grid: Dict[str, List], samples: int = 0, seed: int = 0) -> List[Dict]:
+    """Expand the grid, or draw `samples` distinct random combinations from it."""
+    names = list(grid)
+    if samples:
+        # Sample positions in the product without replacement and decode them
+        # in mixed radix, so no combination is evaluated twice
+        sizes = [len(grid[name]) for name in names]
+        positions = random.Random(seed).sample(range(math.prod(sizes)), min(samples, math.prod(sizes)))
+        parameters = []
+        for position in positions:
+            values = {}
+            for name, size in zip(reversed(names), reversed(sizes)):
+                position, index = divmod(position, size)
+                values[name] = grid[name][index]
+            parameters.append({name: values[name] for name in names})
+        return parameters
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def run_sweep(parameters: List[Dict], workers: int = None) -> pd.DataFrame:
+    """Evaluate parameter sets across a process pool, ranked by Sharpe ratio."""
+    scores, prices, cycle_day, _ = load_backtest_inputs()
+    workers = workers or os.cpu_count()
+
+    segments, specs = [], {}
+    try:
+        for key, array in (('scores', scores), ('prices', prices), ('cycle_day', cycle_day)):
+            segment, specs[key] = _share(array)
+            segments.append(segment)
+
+        chunk_size = max(1, len(parameters) // (workers * 8))
+        chunks = [parameters[i:i + chunk_size] for i in range(0, len(parameters), chunk_size)]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+            results = [result for chunk in pool.map(_evaluate, chunks) for result in chunk]
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    return pd.DataFrame(results).sort_values(['sharpe', 'total_return'], ascending=False, ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sweep signal weights and risk thresholds over stored history')
+    parser.add_argument('--samples', type=int, default=0, help='Random combinations to evaluate (default: full grid)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--top', type=int, default=20, help='Number of results to print')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    parameters = generate_parameters(config.SWEEP_GRID, args.samples, args.seed)
+    print(f"Evaluating {len(parameters):,} parameter sets...")
+
+    start = time.perf_counter()
+    results = run_sweep(parameters, args.workers)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(config.REPORTS_DIR, exist_ok=True)
+    output_path = os.path.join(config.REPORTS_DIR, 'sweep_results.csv')
+    results.to_csv(output_path, index=False)
+
+    print(f"Finished in {elapsed:.1f}s, results saved to {output_path}")
+    print(results.head(args.top).to_string(index=False))
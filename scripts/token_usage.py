@@ -0,0 +1,214 @@
+import sys
+import os
+import logging
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from logs import get_log_context
+
+try:
+    import tiktoken
+except ImportError:  # Token estimates fall back to a characters-per-token ratio
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Rough average for English text when tiktoken is unavailable
+
+_encodings = {}
+
+def _encoding(model: str):
+    """Get the cached tiktoken encoding for a model, None without tiktoken."""
+    if tiktoken is None:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding('o200k_base')
+    return _encodings[model]
+
+def count_tokens(text: str, model: str = 'gpt-4o-mini') -> int:
+    """Count (or estimate, without tiktoken) the tokens in a piece of text."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = 'gpt-4o-mini') -> str:
+    """Cut text to at most `max_tokens`, at a word boundary where possible."""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    encoding = _encoding(model)
+    if encoding is None:
+        truncated = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        truncated = encoding.decode(encoding.encode(text)[:max_tokens])
+
+    # Drop a partial trailing word
+    head, _, _ = truncated.rpartition(' ')
+    return (head or truncated).rstrip(' ,;:') + '...'
+
+def compact_key_points(key_points: List[str], max_tokens: int, model: str = 'gpt-4o-mini') -> List[str]:
+    """Normalize, de-duplicate and trim key points to fit a token budget.
+
+    Points keep their original order; the first one that does not fit is
+    truncated and the rest are dropped.
+    """
+    compacted = []
+    seen = set()
+    remaining = max_tokens
+
+    for point in key_points:
+        point = re.sub(r'\s+', ' ', str(point)).strip().lstrip('-*• ').strip()
+        key = point.lower().rstrip('.')
+        if not point or key in seen:
+            continue
+        seen.add(key)
+
+        tokens = count_tokens(point, model)
+        if tokens > remaining:
+            point = truncate_to_tokens(point, remaining, model)
+            if point:
+                compacted.append(point)
+            break
+        compacted.append(point)
+        remaining -= tokens
+
+    return compacted
+
+class TokenUsageTracker:
+    """Collects prompt and completion tokens and latency of every LLM call.
+
+    Calls are tagged with the current cycle ID and stage from the log context,
+    kept in memory until flush() appends them to TOKEN_USAGE_FILE, and can be
+    summarized per service and model.
+    """
+
+    def __init__(self, usage_file: str = config.TOKEN_USAGE_FILE):
+        self.usage_file = usage_file
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        service: str,
+        model: str,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        latency_ms: float,
+        entity: Optional[str] = None
+    ):
+        """Record one API call from the provider's reported usage."""
+        context = get_log_context()
+        record = {
+            'timestamp': datetime.now(),
+            'cycle_id': context['cycle_id'],
+            'stage': context['stage'],
+            'service': service,
+            'model': model,
+            'entity': entity,
+            'prompt_tokens': prompt_tokens or 0,
+            'completion_tokens': completion_tokens or 0,
+            'total_tokens': (prompt_tokens or 0) + (completion_tokens or 0),
+            'latency_ms': latency_ms
+        }
+        with self._lock:
+            self.records.append(record)
+
+        logger.debug(
+            "%s %s used %d prompt + %d completion tokens", service, model,
+            record['prompt_tokens'], record['completion_tokens'], extra={'latency_ms': latency_ms}
+        )
+
+    def record_openai(self, response, latency_ms: float, entity: Optional[str] = None):
+        """Record a call from an OpenAI response object's `usage` field."""
+        usage = getattr(response, 'usage', None)
+        self.record(
+            'openai', response.model,
+            getattr(usage, 'prompt_tokens', None), getattr(usage, 'completion_tokens', None),
+            latency_ms, entity
+        )
+
+    def record_perplexity(self, result: Dict, latency_ms: float):
+        """Record a call from a Perplexity response body's `usage` field."""
+        usage = result.get('usage') or {}
+        self.record(
+            'perplexity', result.get('model'),
+            usage.get('prompt_tokens'), usage.get('completion_tokens'),
+            latency_ms
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(self.records, columns=[
+                'timestamp', 'cycle_id', 'stage', 'service', 'model', 'entity',
+                'prompt_tokens', 'completion_tokens', 'total_tokens', 'latency_ms'
+            ])
+
+    def summary(self, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Aggregate recorded calls (or the given calls) per service and model."""
+        df = self.to_frame() if df is None else df
+        return df.groupby(['service', 'model'], dropna=False).agg(
+            calls=('total_tokens', 'size'),
+            prompt_tokens=('prompt_tokens', 'sum'),
+            completion_tokens=('completion_tokens', 'sum'),
+            total_tokens=('total_tokens', 'sum'),
+            mean_latency_ms=('latency_ms', 'mean'),
+            max_latency_ms=('latency_ms', 'max')
+        )
+
+    def flush(self) -> pd.DataFrame:
+        """Append recorded calls to the usage file, log their summary and start over.
+
+        Returns the summary of the flushed calls.
+        """
+        df = self.to_frame()
+        summary = self.summary(df)
+        if df.empty:
+            return summary
+
+        os.makedirs(os.path.dirname(self.usage_file) or '.', exist_ok=True)
+        df.to_csv(self.usage_file, mode='a', index=False, header=not os.path.exists(self.usage_file))
+        with self._lock:
+            del self.records[:len(df)]
+
+        logger.info(
+            "Token usage: %d calls, %d prompt + %d completion tokens\n%s",
+            summary['calls'].sum(), summary['prompt_tokens'].sum(), summary['completion_tokens'].sum(),
+            summary.to_string()
+        )
+        return summary
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_token_tracker() -> TokenUsageTracker:
+    """Get the process-wide token usage tracker."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = TokenUsageTracker()
+        return _tracker
+
+if __name__ == "__main__":
+    # Summarize token usage per cycle
+    usage = pd.read_csv(config.TOKEN_USAGE_FILE)
+    per_cycle = usage.groupby(['cycle_id', 'service']).agg(
+        calls=('total_tokens', 'size'),
+        prompt_tokens=('prompt_tokens', 'sum'),
+        completion_tokens=('completion_tokens', 'sum'),
+        mean_latency_ms=('latency_ms', 'mean')
+    )
+    print(f"\nToken usage from {config.TOKEN_USAGE_FILE}:")
+    print(per_cycle.to_string())
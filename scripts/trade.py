@@ -1,25 +1,53 @@
 import sys
 import os
+import logging
 import pandas as pd
 from coinbase.wallet.client import Client
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+import threading
 import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 from notify import EmailNotifier
+from price_store import PriceHistoryStore
+from sim_exchange import SimulatedExchangeClient
+from cassette import CassetteClient, get_cassette
+from strategy import Strategy
+
+logger = logging.getLogger(__name__)
 
 class CryptoTrader:
-    def __init__(self):
-        self.client = Client(config.COINBASE_API_KEY, config.COINBASE_API_SECRET)
+    def __init__(self, strategy: Strategy = None):
+        self.strategy = strategy or Strategy()
+        self.client = self._create_client()
         self.notifier = EmailNotifier()
+        self.price_store = PriceHistoryStore()
         self.trade_history = self._load_trade_history()
+        self._lock = threading.RLock()  # Risk checks and trading cycles run on separate threads
+        
+    def _create_client(self):
+        """Create the live Coinbase client, or the simulated exchange for dry runs.
+        
+        With an active cassette, calls are recorded, or served from the recording
+        without any client at all.
+        """
+        cassette = get_cassette()
+        service = f'coinbase:{self.strategy.name}'
+        if cassette is not None and cassette.mode == 'replay':
+            return CassetteClient(None, cassette, service)
+            
+        if config.EXCHANGE_MODE == 'paper':
+            client = SimulatedExchangeClient()
+        else:
+            client = Client(self.strategy.api_key, self.strategy.api_secret)
+        return CassetteClient(client, cassette, service) if cassette is not None else client
         
     def _load_trade_history(self) -> pd.DataFrame:
         """Load or create trade history DataFrame."""
-        if os.path.exists(config.TRADE_HISTORY_FILE):
-            return pd.read_csv(config.TRADE_HISTORY_FILE)
+        if os.path.exists(self.strategy.trade_history_file):
+            return pd.read_csv(self.strategy.trade_history_file)
         return pd.DataFrame(columns=[
             'timestamp', 'symbol', 'action', 'amount_usd', 
             'crypto_amount', 'price', 'status'
@@ -27,19 +55,55 @@ class CryptoTrader:
         
     def _save_trade_history(self):
         """Save trade history to CSV file."""
-        self.trade_history.to_csv(config.TRADE_HISTORY_FILE, index=False)
+        os.makedirs(os.path.dirname(self.strategy.trade_history_file) or '.', exist_ok=True)
+        self.trade_history.to_csv(self.strategy.trade_history_file, index=False)
         
     def _get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price for a cryptocurrency."""
         try:
             ticker = self.client.get_spot_price(currency_pair=f'{symbol}-USD')
-            return float(ticker.amount)
+            price = float(ticker.amount)
         except Exception as e:
-            print(f"Error getting price for {symbol}: {str(e)}")
+            logger.error("Error getting price for %s: %s", symbol, e, extra={'symbol': symbol})
             return None
             
-    def _place_order(self, symbol: str, action: str, amount_usd: float) -> Dict:
-        """Place a buy or sell order."""
+        # Keep every real quote for PnL, charts and backtests
+        if config.EXCHANGE_MODE == 'live' and config.CASSETTE_MODE != 'replay':
+            try:
+                self.price_store.record_quote(symbol, price)
+            except Exception as e:
+                logger.warning("Error recording price for %s: %s", symbol, e, extra={'symbol': symbol})
+        return price
+            
+    @staticmethod
+    def _filled(order, amount_usd: float, crypto_amount: float, price: float):
+        """USD value, quantity and price the order actually filled at.
+
+        Falls back to the requested values when the order does not report them.
+        """
+        try:
+            return (
+                float(order.subtotal.amount),
+                float(order.amount.amount),
+                float(order.unit_price.amount)
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return amount_usd, crypto_amount, price
+
+    def _place_order(
+        self,
+        symbol: str,
+        action: str,
+        amount_usd: float,
+        crypto_amount: Optional[float] = None,
+        before_send: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """Place a buy or sell order; sells of a known quantity pass `crypto_amount`.
+        
+        `before_send` is called right before the order goes to the exchange, so
+        callers can tell orders that failed earlier (e.g. on the quote) apart.
+        """
+        start = time.perf_counter()
         try:
             # Get current price
             price = self._get_current_price(symbol)
@@ -47,7 +111,8 @@ class CryptoTrader:
                 return None
                 
             # Calculate crypto amount
-            crypto_amount = amount_usd / price
+            if crypto_amount is None:
+                crypto_amount = amount_usd / price
             
             # Send notification
             self.notifier.send_trade_notification(
@@ -58,6 +123,8 @@ class CryptoTrader:
             )
             
             # Place order
+            if before_send is not None:
+                before_send()
             if action == 'buy':
                 order = self.client.buy(
                     amount=str(amount_usd),
@@ -71,7 +138,9 @@ class CryptoTrader:
                     payment_method='usd_wallet'
                 )
             
-            # Record trade
+            # Record what was filled, which fees, slippage and partial fills make
+            # differ from what was requested
+            amount_usd, crypto_amount, price = self._filled(order, amount_usd, crypto_amount, price)
             trade_record = {
                 'timestamp': datetime.now(),
                 'symbol': symbol,
@@ -87,20 +156,51 @@ class CryptoTrader:
             ], ignore_index=True)
             self._save_trade_history()
             
+            logger.info(
+                "Placed %s order for %s: $%.2f at $%.2f", action, symbol, amount_usd, price,
+                extra={'symbol': symbol, 'latency_ms': (time.perf_counter() - start) * 1000}
+            )
             return order
             
         except Exception as e:
-            print(f"Error placing {action} order for {symbol}: {str(e)}")
+            logger.error("Error placing %s order for %s: %s", action, symbol, e, extra={'symbol': symbol})
             return None
             
+    def _close_position(self, index: int, current_price: float) -> Optional[Dict]:
+        """Sell an open buy position and mark it closed so it is not exited twice."""
+        trade = self.trade_history.loc[index]
+        order = self._place_order(
+            trade['symbol'],
+            'sell',
+            trade['crypto_amount'] * current_price,
+            crypto_amount=trade['crypto_amount']
+        )
+        
+        if order is not None:
+            self.trade_history.loc[index, 'status'] = 'closed'
+            self._save_trade_history()
+        return order
+            
+    def get_open_positions(self) -> pd.DataFrame:
+        """Get completed buys that have not been exited yet."""
+        history = self.trade_history
+        return history[
+            (history['action'] == 'buy') &
+            (history['status'] == 'completed')
+        ].copy()
+        
+    def close_position(self, index: int, current_price: float) -> Optional[Dict]:
+        """Exit an open position triggered by an external risk check."""
+        with self._lock:
+            if self.trade_history.loc[index, 'status'] != 'completed':
+                return None
+            return self._close_position(index, current_price)
+            
     def _check_stop_loss_take_profit(self):
         """Check and execute stop-loss and take-profit orders."""
-        recent_buys = self.trade_history[
-            (self.trade_history['action'] == 'buy') &
-            (self.trade_history['status'] == 'completed')
-        ].copy()
+        recent_buys = self.get_open_positions()
         
-        for _, trade in recent_buys.iterrows():
+        for index, trade in recent_buys.iterrows():
             current_price = self._get_current_price(trade['symbol'])
             if not current_price:
                 continue
@@ -108,41 +208,63 @@ class CryptoTrader:
             purchase_price = trade['price']
             price_change = ((current_price - purchase_price) / purchase_price) * 100
             
-            # Check stop-loss
-            if price_change <= -config.STOP_LOSS_PERCENTAGE:
-                self._place_order(
-                    trade['symbol'],
-                    'sell',
-                    trade['amount_usd'] * (current_price / purchase_price)
-                )
+            # Check stop-loss and take-profit
+            if (price_change <= -self.strategy.stop_loss or
+                    price_change >= self.strategy.take_profit):
+                self._close_position(index, current_price)
                 
-            # Check take-profit
-            elif price_change >= config.TAKE_PROFIT_PERCENTAGE:
-                self._place_order(
-                    trade['symbol'],
-                    'sell',
-                    trade['amount_usd'] * (current_price / purchase_price)
-                )
+    def check_risk_limits(self):
+        """Run stop-loss and take-profit checks outside of a trading cycle."""
+        with self._lock:
+            self._check_stop_loss_take_profit()
                 
-    def execute_trades(self, trading_signals: Dict[str, List[str]]):
-        """Execute trades based on trading signals."""
-        # First, check stop-loss and take-profit conditions
-        self._check_stop_loss_take_profit()
+    def _submit_once(self, symbol: str, action: str, amount_usd: float, checkpoint=None) -> Optional[Dict]:
+        """Place an order unless the cycle checkpoint shows it was already sent."""
+        key = f'{self.strategy.name}:{action}:{symbol}'
+        if checkpoint is None:
+            return self._place_order(symbol, action, amount_usd)
+            
+        if checkpoint.has_order(key):
+            logger.info("Skipping %s %s: already submitted in this cycle", action, symbol, extra={'symbol': symbol})
+            return None
+            
+        # 'pending' is recorded right before sending, so a crash mid-order is never retried
+        order = self._place_order(
+            symbol, action, amount_usd,
+            before_send=lambda: checkpoint.record_order(key, 'pending')
+        )
+        
+        if order is not None:
+            checkpoint.record_order(key, 'submitted')
+        elif checkpoint.order_status(key) == 'pending':
+            checkpoint.record_order(key, 'failed')  # The exchange call itself failed; it may have gone through
+        else:
+            checkpoint.record_order(key, 'not_sent')
+        return order
+        
+    def execute_trades(self, trading_signals: Dict[str, List[str]], checkpoint=None):
+        """Execute trades based on trading signals.
         
-        # Execute new trades
-        for symbol in trading_signals['buy']:
-            self._place_order(symbol, 'buy', config.TRADE_AMOUNT_USD)
-            time.sleep(1)  # Rate limiting
+        When a cycle checkpoint is given, orders it already records are skipped.
+        """
+        with self._lock:
+            # First, check stop-loss and take-profit conditions
+            self._check_stop_loss_take_profit()
             
-        for symbol in trading_signals['sell']:
-            # Check if we own the asset
-            try:
-                account = self.client.get_account(f'{symbol}-USD')
-                if float(account.balance.amount) > 0:
-                    self._place_order(symbol, 'sell', config.TRADE_AMOUNT_USD)
+            # Execute new trades
+            for symbol in trading_signals['buy']:
+                if self._submit_once(symbol, 'buy', self.strategy.trade_amount_usd, checkpoint) is not None:
                     time.sleep(1)  # Rate limiting
-            except Exception as e:
-                print(f"Error checking balance for {symbol}: {str(e)}")
+                
+            for symbol in trading_signals['sell']:
+                # Check if we own the asset
+                try:
+                    account = self.client.get_account(f'{symbol}-USD')
+                    if float(account.balance.amount) > 0:
+                        if self._submit_once(symbol, 'sell', self.strategy.trade_amount_usd, checkpoint) is not None:
+                            time.sleep(1)  # Rate limiting
+                except Exception as e:
+                    logger.error("Error checking balance for %s: %s", symbol, e, extra={'symbol': symbol})
                 
     def get_portfolio_summary(self) -> pd.DataFrame:
         """Get current portfolio summary."""
@@ -162,6 +284,9 @@ class CryptoTrader:
 if __name__ == "__main__":
     from analyze_sentiment import SentimentAnalyzer
     from fetch_news import NewsFetcher
+    from logs import setup_logging
+    
+    setup_logging(log_file=None)
     
     # Test the trading pipeline
     fetcher = NewsFetcher()
@@ -8,31 +8,52 @@ from datetime import datetime, timedelta
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from pnl import PnLEngine
+from price_store import PriceHistoryStore
 
 class PortfolioVisualizer:
-    def __init__(self):
-        self.trade_history = pd.read_csv(config.TRADE_HISTORY_FILE)
+    def __init__(self, trade_history_file: str = None):
+        self.trade_history = pd.read_csv(trade_history_file or config.TRADE_HISTORY_FILE)
         self.sentiment_data = pd.read_csv(config.SENTIMENT_DATA_FILE)
+        self.price_store = PriceHistoryStore()
+        self.pnl = PnLEngine(self.trade_history, self._load_prices())
+        
+    def _load_prices(self) -> pd.DataFrame:
+        """Load daily closes for traded symbols from the local price history."""
+        if self.trade_history.empty:
+            return pd.DataFrame()
+        start = pd.to_datetime(self.trade_history['timestamp']).min().normalize()
+        return self.price_store.daily_closes(self.trade_history['symbol'].unique(), start=start)
         
     def plot_portfolio_value(self, save_path: str = None):
-        """Create an interactive plot of portfolio value over time."""
-        # Group trades by day and calculate daily portfolio value
-        daily_value = self.trade_history.copy()
-        daily_value['date'] = pd.to_datetime(daily_value['timestamp']).dt.date
-        daily_value['value'] = daily_value['amount_usd']
-        daily_value = daily_value.groupby('date')['value'].sum().cumsum()
+        """Create an interactive plot of mark-to-market portfolio PnL over time."""
+        equity_curve = self.pnl.equity_curve
         
         # Create figure
         fig = go.Figure()
         
-        # Add portfolio value line
+        # Add net PnL, realized PnL and holdings value lines
         fig.add_trace(go.Scatter(
-            x=daily_value.index,
-            y=daily_value.values,
-            mode='lines+markers',
-            name='Portfolio Value',
+            x=equity_curve.index,
+            y=equity_curve['equity'],
+            mode='lines',
+            name='Net PnL',
             line=dict(color='blue')
         ))
+        fig.add_trace(go.Scatter(
+            x=equity_curve.index,
+            y=equity_curve['realized_pnl'],
+            mode='lines',
+            name='Realized PnL',
+            line=dict(color='green', dash='dot')
+        ))
+        fig.add_trace(go.Scatter(
+            x=equity_curve.index,
+            y=equity_curve['market_value'],
+            mode='lines',
+            name='Holdings Value',
+            line=dict(color='gray')
+        ))
         
         # Update layout
         fig.update_layout(
@@ -46,6 +67,34 @@ class PortfolioVisualizer:
             fig.write_html(save_path)
         return fig
         
+    def plot_drawdown(self, save_path: str = None):
+        """Create an interactive plot of drawdown from the running PnL peak."""
+        equity_curve = self.pnl.equity_curve
+        
+        # Create figure
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=equity_curve.index,
+            y=equity_curve['drawdown'],
+            mode='lines',
+            name='Drawdown',
+            fill='tozeroy',
+            line=dict(color='red')
+        ))
+        
+        # Update layout
+        fig.update_layout(
+            title='Drawdown Over Time',
+            xaxis_title='Date',
+            yaxis_title='Drawdown (USD)',
+            hovermode='x unified'
+        )
+        
+        if save_path:
+            fig.write_html(save_path)
+        return fig
+        
     def plot_trade_history(self, save_path: str = None):
         """Create an interactive plot of trade history."""
         # Create figure with secondary y-axis
@@ -129,6 +178,9 @@ class PortfolioVisualizer:
         self.plot_portfolio_value(
             os.path.join(output_dir, 'portfolio_value.html')
         )
+        self.plot_drawdown(
+            os.path.join(output_dir, 'drawdown.html')
+        )
         self.plot_trade_history(
             os.path.join(output_dir, 'trade_history.html')
         )
@@ -142,13 +194,18 @@ class PortfolioVisualizer:
             'buy_trades': len(self.trade_history[self.trade_history['action'] == 'buy']),
             'sell_trades': len(self.trade_history[self.trade_history['action'] == 'sell']),
             'total_volume_usd': self.trade_history['amount_usd'].sum(),
-            'avg_trade_size_usd': self.trade_history['amount_usd'].mean()
+            'avg_trade_size_usd': self.trade_history['amount_usd'].mean(),
+            **self.pnl.summary()
         }
         
         # Save statistics to file
         stats_df = pd.DataFrame([stats])
         stats_df.to_csv(os.path.join(output_dir, 'performance_stats.csv'), index=False)
         
+        # Save daily equity curve and per-symbol PnL attribution
+        self.pnl.equity_curve.to_csv(os.path.join(output_dir, 'equity_curve.csv'))
+        self.pnl.attribution.to_csv(os.path.join(output_dir, 'pnl_attribution.csv'), index=False)
+        
         return stats
 
 if __name__ == "__main__":